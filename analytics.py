@@ -0,0 +1,129 @@
+import gzip
+import json
+import sys
+from itertools import islice
+from multiprocessing import Pool
+
+from model import replay
+
+# ==========================================
+# 回放档案分析:生成器读入 + 进程池回放 + 归并
+# ==========================================
+# 档案为 JSONL (可 gzip 压缩),每行一局,格式同 utils.ReplayArchive 写入的记录:
+#   {"player", "difficulty", "rows", "cols", "mines", "seed", "topology", "actions": [[毫秒, 操作, r, c], ...]}
+# 输入按批次喂给进程池,任何时刻内存里最多只有一批原始行,与档案大小无关。
+# 注意:iOS 上的 Pythonista 不支持多进程,请在桌面端运行,或传 processes=1 单进程执行。
+
+
+def iter_lines(paths):
+    """逐行读取若干档案文件 (惰性生成器)"""
+    for path in paths:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip(): yield line
+
+
+def analyse_line(line):
+    """
+    在工作进程里回放一局,返回这一局的统计 (只含少量数字,回传开销很小)。
+    损坏的记录返回 None。
+    """
+    try:
+        rec = json.loads(line)
+        actions = [tuple(a) for a in rec['actions']]
+        model = replay(rec['difficulty'], rec['rows'], rec['cols'], rec['mines'], rec['seed'], actions,
+                       rec.get('topology', 'grid'))
+    except (ValueError, KeyError, TypeError):
+        return None
+    metrics = model.get_metrics() or {}
+    return {
+        'player': rec.get('player', '?'),
+        'difficulty': rec['difficulty'],
+        'won': model.won,
+        'duration': actions[-1][0] / 1000 if actions else 0.0,
+        '3bv': metrics.get('3bv', 0),
+        'clicks': len(actions),
+        'flags': sum(1 for a in actions if a[1] == 'f'),
+        'chords': sum(1 for a in actions if a[1] in ('h', 'a')),
+    }
+
+
+class Summary:
+    """可合并的累加器 (map-reduce 中的 reduce 端),只保存计数与总和"""
+    FIELDS = ('games', 'wins', 'won_time', 'won_3bv', 'clicks', 'flags', 'chords', 'nf_wins')
+
+    def __init__(self):
+        for f in self.FIELDS: setattr(self, f, 0)
+
+    def add(self, g):
+        self.games += 1
+        self.clicks += g['clicks']
+        self.flags += g['flags']
+        self.chords += g['chords']
+        if g['won']:
+            self.wins += 1
+            self.won_time += g['duration']
+            self.won_3bv += g['3bv']
+            if g['flags'] == 0: self.nf_wins += 1
+
+    def merge(self, other):
+        for f in self.FIELDS: setattr(self, f, getattr(self, f) + getattr(other, f))
+
+    def report(self):
+        """派生指标:胜率、每 3BV 用时、3BV/s、点击效率、不插旗 (NF) 风格占比"""
+        return {
+            'games': self.games,
+            'win_rate': self.wins / self.games if self.games else 0.0,
+            'time_per_3bv': self.won_time / self.won_3bv if self.won_3bv else 0.0,
+            '3bv/s': self.won_3bv / self.won_time if self.won_time else 0.0,
+            'clicks_per_game': self.clicks / self.games if self.games else 0.0,
+            'flags_per_game': self.flags / self.games if self.games else 0.0,
+            'chords_per_game': self.chords / self.games if self.games else 0.0,
+            'nf_ratio': self.nf_wins / self.wins if self.wins else 0.0,
+        }
+
+
+def analyse(paths, processes=None, batch=4096, chunksize=64):
+    """
+    分析若干档案文件。
+    :param processes: 进程数,None 表示 CPU 核数,1 表示在当前进程内执行
+    :param batch: 每批送入进程池的行数,决定峰值内存
+    :return: {'all': 总体, 'players': {玩家: 指标}, 'difficulties': {难度: 指标}, 'skipped': 损坏记录数}
+    """
+    total, players, difficulties = Summary(), {}, {}
+    skipped = 0
+
+    def reduce(g):
+        total.add(g)
+        players.setdefault(g['player'], Summary()).add(g)
+        difficulties.setdefault(g['difficulty'], Summary()).add(g)
+
+    lines = iter_lines(paths)
+    if processes == 1:
+        results = (analyse_line(line) for line in lines)
+        for g in results:
+            if g is None: skipped += 1
+            else: reduce(g)
+    else:
+        with Pool(processes) as pool:
+            # Pool.imap 会一次性吞掉整个输入迭代器,所以这里手动分批,保证内存平稳
+            while True:
+                chunk = list(islice(lines, batch))
+                if not chunk: break
+                for g in pool.imap_unordered(analyse_line, chunk, chunksize):
+                    if g is None: skipped += 1
+                    else: reduce(g)
+
+    return {
+        'all': total.report(),
+        'players': {k: v.report() for k, v in players.items()},
+        'difficulties': {k: v.report() for k, v in difficulties.items()},
+        'skipped': skipped,
+    }
+
+
+if __name__ == '__main__':
+    # 用法: python analytics.py replays.jsonl [more.jsonl.gz ...]
+    json.dump(analyse(sys.argv[1:]), sys.stdout, ensure_ascii=False, indent=2)
+    print()
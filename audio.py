@@ -0,0 +1,102 @@
+import time
+from collections import deque
+
+import sound
+
+# ==========================================
+# 音效引擎:预加载 + 发声数限制 + 最小重触发间隔
+# ==========================================
+# sound.play_effect 第一次播放某个音效时要先从磁盘解码,首次点击会有明显延迟;
+# 快速连击 (Chord、全盘清扫) 时同一音效会叠出几十个声部,混音器过载后爆音。
+# 这里在启动时一次性 load_effect 所有用到的音效,之后每次播放都检查:
+#   - 距离上次触发太近的直接丢弃 (听感上本来就分辨不出);
+#   - 同一音效的声部数达到上限时先停掉最早的那个;
+#   - 所有音效合计的声部数也有上限。
+# 声部的结束时间按音效的大致时长估算,Effect 对象不保证提供 playing 状态。
+
+# 音效名 -> (最大声部数, 最小重触发间隔 秒, 大致时长 秒)
+EFFECTS = {
+    'ui:click1':          (2, 0.05, 0.2),
+    'ui:click2':          (3, 0.04, 0.2),
+    'ui:click3':          (2, 0.05, 0.2),
+    'ui:switch9':         (2, 0.05, 0.3),
+    'ui:switch10':        (2, 0.05, 0.3),
+    'ui:switch33':        (1, 0.1, 0.3),
+    'arcade:Explosion_1': (1, 0.5, 1.5),
+    'digital:PowerUp7':   (1, 0.5, 1.0),
+}
+DEFAULT_LIMITS = (2, 0.05, 0.5) # 未登记的音效
+
+MAX_VOICES = 8 # 所有音效合计同时发声的上限
+
+
+class AudioEngine:
+    """
+    :param effects: 音效名 -> (最大声部数, 最小重触发间隔, 大致时长),默认为 EFFECTS
+    :param max_voices: 全局同时发声上限
+    """
+
+    def __init__(self, effects=None, max_voices=MAX_VOICES):
+        self.effects = dict(EFFECTS if effects is None else effects)
+        self.max_voices = max_voices
+        self.voices = deque()   # 正在发声的 (结束时间, 音效名, Effect),按开始时间排列
+        self.last_played = {}   # 音效名 -> 上次触发时间
+        self.loaded = False
+        self.muted = False
+
+    def preload(self):
+        """启动时预加载所有登记过的音效 (可重复调用,只加载一次)"""
+        if self.loaded: return
+        self.loaded = True
+        for name in self.effects:
+            try: sound.load_effect(name)
+            except Exception: pass # 缺失的音效不影响其余的加载
+
+    def play(self, name, volume=1.0, pitch=1.0):
+        """
+        播放音效;被间隔或声部限制丢弃时返回 None,否则返回 Effect。
+        未预加载的音效会在这里补加载一次。
+        """
+        if self.muted: return None
+        now = time.perf_counter()
+        if name not in self.effects:
+            self.effects[name] = DEFAULT_LIMITS
+            try: sound.load_effect(name)
+            except Exception: pass
+        voices, interval, length = self.effects[name]
+        last = self.last_played.get(name)
+        if last is not None and now - last < interval: return None
+
+        self._retire(now)
+        same = [v for v in self.voices if v[1] == name]
+        if len(same) >= voices: self._stop(same[0])
+        if len(self.voices) >= self.max_voices: self._stop(self.voices[0])
+
+        effect = sound.play_effect(name, volume, pitch)
+        self.last_played[name] = now
+        self.voices.append((now + length, name, effect))
+        return effect
+
+    def stop_all(self):
+        while self.voices: self._stop(self.voices[0])
+
+    def _retire(self, now):
+        """丢掉估计已经播完的声部 (不需要 stop)"""
+        self.voices = deque(v for v in self.voices if v[0] > now)
+
+    def _stop(self, voice):
+        self.voices.remove(voice)
+        try: voice[2].stop()
+        except Exception: pass
+
+
+# 全局共用的音效引擎 (菜单与游戏场景共用同一份预加载与声部状态)
+mixer = AudioEngine()
+
+
+def preload():
+    mixer.preload()
+
+
+def play(name, volume=1.0, pitch=1.0):
+    return mixer.play(name, volume, pitch)
@@ -0,0 +1,305 @@
+import random
+import time
+
+from model import MinesweeperModel, CHANGE_REVEAL, CHANGE_MARK, sample_mines
+from topology import table_for
+
+# ==========================================
+# 位棋盘后端:用 Python 大整数存储整盘状态
+# ==========================================
+# 每个格子对应一个比特。棋盘四周各留一圈空白 (padding),
+# 宽度 W = cols + 2,格子 (r, c) 的比特位为 (r + 1) * W + (c + 1)。
+# 这样邻居 = 固定位移 (±1, ±W, ±W±1),边界外的比特恒为 0,不需要任何越界判断。
+# 批量运算 (移位 / 与或 / popcount) 都在 int 的 C 实现里完成。
+
+
+class _BitSetView:
+    """把某个比特平面包装成只读集合,兼容 `(r, c) in model.revealed` 等写法"""
+
+    def __init__(self, model, attr):
+        self.m = model
+        self.attr = attr
+
+    def __contains__(self, pos):
+        r, c = pos
+        return 0 <= r < self.m.rows and 0 <= c < self.m.cols and \
+            (getattr(self.m, self.attr) >> self.m.bit(r, c)) & 1 == 1
+
+    def __len__(self):
+        return getattr(self.m, self.attr).bit_count()
+
+    def __iter__(self):
+        return iter(self.m.cells_of(getattr(self.m, self.attr)))
+
+    def __eq__(self, other):
+        return set(self) == set(other)
+
+
+class _GridRow:
+    def __init__(self, model, r):
+        self.m = model
+        self.r = r
+
+    def __getitem__(self, c):
+        return self.m.value(self.r, c)
+
+    def __len__(self):
+        return self.m.cols
+
+
+class _GridView:
+    """兼容 `model.grid[r][c]` 的只读视图:-1 为雷,0-8 为数字"""
+
+    def __init__(self, model):
+        self.m = model
+
+    def __getitem__(self, r):
+        return _GridRow(self.m, r)
+
+    def __len__(self):
+        return self.m.rows
+
+
+class BitboardModel(MinesweeperModel):
+    """
+    与 MinesweeperModel 行为一致的位棋盘实现。
+    雷、翻开、旗帜、问号各占一个大整数;数字以 4 个比特平面 (bit-sliced) 存储。
+    """
+
+    TOPOLOGIES = ('grid',) # 移位实现的邻域只适用于经典方格
+
+    def __init__(self, difficulty_name, rows, cols, mines, seed=None, topology='grid'):
+        # 不调用父类 __init__:父类会分配 rows × cols 的二维列表
+        if topology not in self.TOPOLOGIES: raise ValueError(f'位棋盘后端不支持拓扑 {topology}')
+        self.topology = topology
+        self.diff_name = difficulty_name
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+
+        self.W = cols + 2
+        # 所有真实格子的掩码 (不含 padding):每隔 W 位放一个 1,再乘以单行掩码 (无进位)
+        row_mask = ((1 << cols) - 1) << 1
+        every_row = ((1 << (self.W * rows)) - 1) // ((1 << self.W) - 1)
+        self.inside = (row_mask * every_row) << self.W
+
+        self.mine_bits = 0
+        self.revealed_bits = 0
+        self.flag_bits = 0
+        self.question_bits = 0
+        self.count_planes = (0, 0, 0, 0) # 周围雷数的第 0-3 位
+        self.zero_bits = 0               # 数字为 0 的非雷格子
+
+        self.lazy = False   # 位棋盘本身就是紧凑表示,不需要惰性网格
+        self.disk = None
+        self.grid = _GridView(self)
+        self.revealed = _BitSetView(self, 'revealed_bits')
+        self.flags = _BitSetView(self, 'flag_bits')
+        self.questions = _BitSetView(self, 'question_bits')
+
+        self.game_over = False
+        self.won = False
+        self.first_move = True
+        self.pregenerated = None
+        self.generation = None
+        self.start_time = None
+        self.end_time = None
+        self.metrics = None # 首次调用 get_metrics 时再扫描
+        self.actions = []
+        self.listeners = []
+        self.rehash()
+
+    # ---- 坐标换算 ----
+    def bit(self, r, c):
+        return (r + 1) * self.W + c + 1
+
+    def cells_of(self, bits):
+        """把比特集合展开为 [(r, c)],按位序 (即行优先) 排列"""
+        # 反转的二进制串里逐个 find('1'),扫描在 C 层完成,避免对大整数反复做 O(n) 的异或
+        s = bin(bits)[:1:-1]
+        out = []
+        W = self.W
+        i = s.find('1')
+        while i != -1:
+            out.append((i // W - 1, i % W - 1))
+            i = s.find('1', i + 1)
+        return out
+
+    # ---- 位运算原语 ----
+    def _shifts(self, x):
+        """x 的 8 个邻居方向平移结果:结果第 i 位 = x 在 i 的某个邻居处的比特"""
+        W = self.W
+        return (x >> 1, x << 1, x >> W, x << W,
+                x >> (W - 1), x << (W - 1), x >> (W + 1), x << (W + 1))
+
+    def dilate(self, x):
+        """x 本身加上其 8 邻域 (可分离实现:先横向再纵向)"""
+        h = x | (x << 1) | (x >> 1)
+        return (h | (h << self.W) | (h >> self.W)) & self.inside
+
+    def neighbour_counts(self, x):
+        """
+        对每个格子统计其 8 邻域中属于 x 的个数,返回 4 个比特平面 (b0, b1, b2, b3)。
+        用逐位全加器 (carry-save) 把 8 个平移平面累加起来,全部是整数运算。
+        """
+        b0 = b1 = b2 = b3 = 0
+        for s in self._shifts(x):
+            c0 = b0 & s; b0 ^= s
+            c1 = b1 & c0; b1 ^= c0
+            c2 = b2 & c1; b2 ^= c1
+            b3 |= c2
+        m = self.inside
+        return (b0 & m, b1 & m, b2 & m, b3 & m)
+
+    def _count_at(self, planes, i):
+        b0, b1, b2, b3 = planes
+        return ((b0 >> i) & 1) | ((b1 >> i) & 1) << 1 | ((b2 >> i) & 1) << 2 | ((b3 >> i) & 1) << 3
+
+    def count_bits_around(self, x, r, c):
+        """单个格子周围属于 x 的个数:一次与运算 + popcount"""
+        return (x & self._neighbour_window(r, c)).bit_count()
+
+    # ---- 查询 ----
+    def value(self, r, c):
+        i = self.bit(r, c)
+        if (self.mine_bits >> i) & 1: return -1
+        return self._count_at(self.count_planes, i)
+
+    def neighbours(self, r, c):
+        """(r, c) 的邻居坐标元组;位棋盘没有自己的邻接表 (nb),取同尺寸共享的那一份"""
+        return table_for(self).around[r * self.cols + c]
+
+    def count_around(self, r, c, condition_func):
+        return sum(1 for nr, nc in self.neighbours(r, c) if condition_func(nr, nc))
+
+    def chord_ready(self, r, c):
+        """已翻开的数字格周围旗帜数是否恰好等于数字"""
+        if (r, c) not in self.revealed: return False
+        v = self.value(r, c)
+        return v > 0 and self.count_bits_around(self.flag_bits, r, c) == v
+
+    def all_mines_flagged(self):
+        return not self.first_move and self.flag_bits == self.mine_bits
+
+    # ---- 生成 ----
+    def _generate_board(self, safe_r, safe_c):
+        """
+        与 MinesweeperModel 共用 sample_mines,同一 seed 下两种后端的雷区完全相同。
+        """
+        self._progress('布雷', 0)
+        for k in sample_mines(self.rng, self.rows, self.cols, self.mines, safe_r * self.cols + safe_c):
+            self.mine_bits |= 1 << self.bit(k // self.cols, k % self.cols)
+        self._progress('计算数字', 0.5)
+        self.count_planes = self.neighbour_counts(self.mine_bits)
+        b0, b1, b2, b3 = self.count_planes
+        self.zero_bits = self.inside & ~self.mine_bits & ~(b0 | b1 | b2 | b3)
+
+    # ---- 操作 ----
+    def toggle_flag(self, r, c):
+        self.start_timer_if_needed()
+        self._log('f', r, c)
+        b = 1 << self.bit(r, c)
+        if self.revealed_bits & b: return
+        if self.flag_bits & b:
+            self.flag_bits ^= b
+            self.question_bits |= b
+            old, state = 'flag', 'question'
+        elif self.question_bits & b:
+            self.question_bits ^= b
+            old, state = 'question', 'none'
+        else:
+            self.flag_bits |= b
+            old, state = 'none', 'flag'
+        self._hash_mark(r, c, old, state)
+        self._notify(CHANGE_MARK, [(r, c, state)])
+        return state
+
+    def clear_mark(self, r, c):
+        b = 1 << self.bit(r, c)
+        if not (self.flag_bits | self.question_bits) & b: return
+        old = 'flag' if self.flag_bits & b else 'question'
+        self.flag_bits &= ~b
+        self.question_bits &= ~b
+        self.start_timer_if_needed()
+        self._log('c', r, c)
+        self._hash_mark(r, c, old, 'none')
+        self._notify(CHANGE_MARK, [(r, c, 'none')])
+
+    def reveal(self, r, c):
+        """
+        翻开格子。泛洪按层推进:每一层只对新翻开的 0 做一次膨胀,
+        再与“可翻开”掩码相与,整层一次完成。
+        :return: 新翻开的格子列表 (首个为点击的格子,其余按行优先顺序)
+        """
+        self.start_timer_if_needed()
+        self._log('r', r, c)
+        if self.first_move:
+            if self.pregenerated is None: self._generate_board(r, c)
+            self.first_move = False
+
+        b = 1 << self.bit(r, c)
+        if (self.revealed_bits | self.flag_bits | self.question_bits) & b:
+            opened = []
+        else:
+            opened = [(r, c)] + self.cells_of(self._open_bits(b) ^ b)
+        self._check_win()
+        self._notify(CHANGE_REVEAL, opened)
+        return opened
+
+    def _open_bits(self, seeds):
+        """
+        翻开一组 (未被遮挡的) 格子并从其中的 0 开始泛洪。
+        :return: 本次新翻开的全部比特
+        """
+        allowed = self.inside & ~(self.revealed_bits | self.flag_bits | self.question_bits)
+        seeds &= allowed
+        if self.mine_bits & seeds:
+            self.game_over = True
+            self.end_time = time.time()
+        region = frontier = seeds
+        while frontier:
+            frontier = self.dilate(frontier & self.zero_bits) & allowed & ~region
+            region |= frontier
+        self.revealed_bits |= region
+        return region
+
+    def _neighbour_window(self, r, c):
+        i = self.bit(r, c)
+        W = self.W
+        return (0b111 << (i - W - 1)) | (0b101 << (i - 1)) | (0b111 << (i + W - 1))
+
+    def _chord(self, r, c):
+        if not self.chord_ready(r, c): return []
+        return self.cells_of(self._open_bits(self._neighbour_window(r, c)))
+
+    def clear_satisfied(self):
+        """
+        全盘清扫的位运算版本:先用比特平面比较一次性求出所有“已满足”的数字格,
+        每一波膨胀得到待翻开格子并整批翻开,直到不再变化。
+        """
+        self.start_timer_if_needed()
+        self._log('a', -1, -1)
+        numbered = self.inside & ~self.mine_bits & ~self.zero_bits
+        f = self.neighbour_counts(self.flag_bits)
+        diff = 0
+        for a, b in zip(f, self.count_planes): diff |= a ^ b
+        satisfied = numbered & ~diff
+        # 与 MinesweeperModel 一致:按“波次”推进,下一波只检查本波新翻开的数字格
+        frontier = satisfied & self.revealed_bits
+        opened = 0
+        while frontier and not self.game_over:
+            new = self._open_bits(self.dilate(frontier))
+            opened |= new
+            frontier = satisfied & new
+        cells = self.cells_of(opened)
+        self._check_win()
+        self._notify(CHANGE_REVEAL, cells)
+        return cells
+
+    def _check_win(self):
+        """胜利条件:已翻开的比特数 == 非雷格子数"""
+        if not self.game_over and self.revealed_bits.bit_count() == self.rows * self.cols - self.mines:
+            self.won = True
+            self.end_time = time.time()
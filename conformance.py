@@ -0,0 +1,143 @@
+import argparse
+import random
+import sys
+
+import engine
+
+# ==========================================
+# 后端一致性差分测试 (桌面端工具)
+# ==========================================
+# 用同一个种子的随机操作流同时驱动参考后端与待测后端,每一步比较:
+#   返回值、广播的变更集、翻开/旗帜/问号集合、已翻开格子的数值、邻域查询、胜负状态、操作日志、
+#   局面哈希 (并与从头重算的哈希比较);
+# 对局结束后再比较棋盘指标,并用两个后端分别回放参考后端的操作日志。
+# 任何差异都会打印出可复现的 (对局种子, 步数),新后端必须在这里全部通过才能上线。
+#
+# 用法: python conformance.py [--games 200] [--steps 200] [--seed 0] [后端名 ...]
+
+
+class Mismatch(Exception):
+    pass
+
+
+def _state(model):
+    grid = model.grid
+    return {
+        'revealed': set(model.revealed),
+        'flags': set(model.flags),
+        'questions': set(model.questions),
+        'numbers': {(r, c): grid[r][c] for r, c in model.revealed},
+        'status': (model.game_over, model.won, model.first_move),
+        'zobrist': model.zobrist,
+        # 接口里的邻域查询:每个已翻开格子的邻居,以及周围旗帜数
+        'neighbours': {pos: sorted(model.neighbours(*pos)) for pos in model.revealed},
+        'flags_around': {(r, c): model.count_around(r, c, lambda nr, nc: (nr, nc) in model.flags)
+                         for r, c in model.revealed},
+        'actions': [a[1:] for a in model.actions], # 时间戳与机器速度有关,不比较
+    }
+
+
+def _normalise(value):
+    """变更集的顺序不属于接口约定,排序后再比较"""
+    return sorted(value) if isinstance(value, list) else value
+
+
+def _recorder(events):
+    return lambda kind, cells: events.append((kind, sorted(cells)))
+
+
+def _random_action(rng, ref):
+    """
+    随机操作,大部分时候避开雷、旗子插在雷上,让对局能走得足够深;
+    仍保留少量“错误”操作以覆盖踩雷、错旗与 Chord 失败的路径。
+    """
+    r, c = rng.randrange(ref.rows), rng.randrange(ref.cols)
+    op = rng.choice('rrffhhca')
+    mine = not ref.first_move and ref.grid[r][c] == -1
+    if op == 'r' and mine and rng.random() < 0.9: op = 'h'
+    if op == 'f' and not ref.first_move and not mine and rng.random() < 0.8: op = 'h'
+    return op, r, c
+
+
+def _apply(model, op, r, c):
+    if op == 'r': return model.reveal(r, c)
+    if op == 'f': return model.toggle_flag(r, c)
+    if op == 'c': return model.clear_mark(r, c)
+    if op == 'h': return model.chord(r, c)
+    return model.clear_satisfied()
+
+
+def _compare(what, a, b):
+    if a != b: raise Mismatch(f'{what}: 参考 {a!r} != 待测 {b!r}')
+
+
+def run_game(backend, game_seed, steps):
+    """对比一局;不一致时抛出 Mismatch"""
+    rng = random.Random(game_seed)
+    rows, cols = rng.randint(2, 24), rng.randint(2, 30)
+    mines = rng.randint(1, rows * cols - 1) if rng.random() < 0.1 else rng.randint(1, max(1, rows * cols // 4))
+    board_seed = rng.getrandbits(64)
+    ref = engine.create('conformance', rows, cols, mines, seed=board_seed, backend='reference')
+    new = engine.create('conformance', rows, cols, mines, seed=board_seed, backend=backend)
+    ref_events, new_events = [], []
+    ref.add_listener(_recorder(ref_events))
+    new.add_listener(_recorder(new_events))
+
+    # 部分对局走“后台预生成雷区”的路径
+    if rng.random() < 0.3:
+        r, c = rng.randrange(rows), rng.randrange(cols)
+        ref.pregenerate(r, c); new.pregenerate(r, c)
+        _compare('预生成后首击', _normalise(ref.reveal(r, c)), _normalise(new.reveal(r, c)))
+
+    for step in range(steps):
+        if ref.game_over or ref.won: break
+        op, r, c = _random_action(rng, ref)
+        try:
+            _compare(f'{op}{(r, c)} 返回值', _normalise(_apply(ref, op, r, c)), _normalise(_apply(new, op, r, c)))
+            _compare('变更广播', ref_events, new_events)
+            expected, actual = _state(ref), _state(new)
+            for key in expected: _compare(key, expected[key], actual[key])
+            _compare('增量哈希', new.zobrist, new.rehash())
+        except Mismatch as e:
+            raise Mismatch(f'第 {step} 步 {e}')
+
+    _compare('棋盘指标', ref.get_metrics(), new.get_metrics())
+    actions = list(ref.actions)
+    for name in ('reference', backend):
+        replayed = engine.create('conformance', rows, cols, mines, seed=board_seed, backend=name)
+        for _, op, r, c in actions:
+            if replayed.game_over or replayed.won: break
+            _apply(replayed, op, r, c)
+        _compare(f'{name} 回放', _state(ref), _state(replayed))
+
+
+def check(backend, games=200, steps=200, seed=0):
+    """
+    :return: 失败列表 [(对局种子, 描述)];空列表表示全部一致
+    """
+    failures = []
+    for g in range(games):
+        game_seed = seed * 1000003 + g
+        try:
+            run_game(backend, game_seed, steps)
+        except Mismatch as e:
+            failures.append((game_seed, str(e)))
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='棋盘后端一致性差分测试')
+    parser.add_argument('backends', nargs='*', help='待测后端,默认为除 reference 外的全部已注册后端')
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    ok = True
+    for name in args.backends or [b for b in engine.BACKENDS if b != 'reference']:
+        failures = check(name, args.games, args.steps, args.seed)
+        print(f'{name}: {args.games - len(failures)}/{args.games} 局一致')
+        for game_seed, msg in failures[:10]:
+            print(f'  对局种子 {game_seed}: {msg}')
+        ok = ok and not failures
+    sys.exit(0 if ok else 1)
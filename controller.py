@@ -3,55 +3,193 @@ from scene import *
 import time
 import dialogs 
 import console
-import sound
+import audio
 
 # 导入自定义模块
-from model import MinesweeperModel
+import engine
 from view import GameRenderer
-from utils import ScoreManager, HapticFeedback
+from utils import ScoreManager, HapticFeedback, ReplayArchive
+from metrics import score_record
+from scheduler import RedrawScheduler
+from worker import AnalysisWorker
+from patterns import pattern_hints
+from gestures import GestureRecognizer, DOWN, MOVE, UP, TAP, DOUBLE_TAP, LONG_PRESS, PAN, ZOOM
+
+# 本帧反馈 (音效 + 震动),同一帧内只播放优先级最高的一个,避免连击时声音叠加
+FEEDBACK = {
+    'mark_none': (0, 'ui:click1', None),
+    'reveal':    (1, 'ui:click2', ('impact', 0)),
+    'question':  (2, 'ui:switch10', ('impact', 0)),
+    'flag':      (3, 'ui:switch9', ('impact', 1)),
+    'chord':     (4, 'ui:click2', ('impact', 1)),
+    'explode':   (5, 'arcade:Explosion_1', ('notification', 2)),
+}
 
 class MinesweeperGame(Scene):
     """游戏主场景控制器"""
     
-    def __init__(self, diff_name, rows, cols, mines):
+    def __init__(self, diff_name, rows, cols, mines, spectator=None, race=None, topology='grid', telemetry=None, leaderboard=None):
         super().__init__()
         # 保存游戏参数,用于"重玩"功能
         self.diff_name = diff_name
         self.rows = rows
         self.cols = cols
         self.mines = mines
+        self.topology = topology
+        
+        # 初始化模型 (使用当前选定的棋盘后端,见 engine.py)
+        self.model = engine.create(diff_name, rows, cols, mines, topology=topology)
+        
+        # 可选的观战服务器 (spectator.SpectatorServer),每帧推送一次增量
+        self.spectator = spectator
+        if spectator:
+            spectator.attach(self.model)
+            spectator.start()
+        
+        # 可选的对战客户端 (race.RaceClient),开局前等待服务器下发种子
+        self.race = race
+        self.race_sent = 0 # 上次上报的翻开格子数
+        self.race_finished = False
+        if race: race.start()
         
-        # 初始化模型
-        self.model = MinesweeperModel(diff_name, rows, cols, mines)
+        # 可选的本地遥测 (telemetry.Telemetry):对局记录与帧/输入耗时
+        self.telemetry = telemetry
         
-        # 交互状态变量
-        self.last_tap = {'pos': None, 'time': 0} # 用于判断双击
+        # 可选的在线排行榜 (leaderboard.LeaderboardClient):胜利成绩入队后在后台上传
+        self.leaderboard = leaderboard
+        self.input_seconds = None # 本帧处理输入的耗时,没有输入时为 None
+        
+        # 交互状态变量:触摸事件先入队,每帧在 update 中统一识别手势并批量处理
+        self.gestures = GestureRecognizer(lambda x, y: self.renderer.cell_at(x, y))
+        self.feedback = None # 本帧待播放的反馈
+        self.scheduler = RedrawScheduler() # 空闲时暂停 Scene,省电
+        self.worker = AnalysisWorker() # 提示、雷区生成等耗时任务在后台线程执行
+        self.generating = False # 首击的雷区正在后台生成
         self.grid_origin = (0, 0) # 网格屏幕坐标偏移量
         self.record_saved = False # 防止重复保存记录
+        self.replay_saved = False # 防止重复保存回放
+        self.player_name = '玩家1' # 最近一次输入的玩家名,用于回放档案
         self.busy = False # 防连点锁
+        self.clear_requested = False # 点了全盘清扫按钮,等待下一帧执行
         
         # 按钮点击区域 (在 draw_overlay 中计算)
         self.btn_restart_rect = Rect(0,0,0,0)
         self.btn_menu_rect = Rect(0,0,0,0)
+        self.btn_clear_rect = Rect(0,0,0,0) # 顶部信息栏里的全盘清扫按钮 (在 draw_clear_button 中计算)
 
     def setup(self):
         """Scene 初始化时调用"""
-        # 计算适配当前屏幕的格子大小
-        self.tile_size = min(self.size.w / self.model.cols, (self.size.h - 60) / self.model.rows)
-        # 初始化渲染器
+        # 初始化渲染器,并计算适配当前屏幕的格子大小
         self.renderer = GameRenderer(self, self.model)
+        self.tile_size = self.renderer.fit_tile_size()
+        # Model 有任何变化都需要重绘,旧的提示随之失效
+        self.model.add_listener(self.on_model_change)
+        self.worker.attach(self.model)
+        self.generating = False # 换局后,旧对局的生成任务即使还在跑也已作废
+        self.scheduler.invalidate()
+
+    def on_model_change(self, kind, cells):
+        self.renderer.hints = None
+        self.wake()
+
+    def update(self):
+        """每帧逻辑更新:处理输入队列、批量推送观战增量、同步对战进度"""
+        self.worker.poll()
+        t0 = time.perf_counter()
+        handled = self.process_input()
+        self.input_seconds = time.perf_counter() - t0 if handled else None
+        if self.race: self.update_race()
+        if self.spectator: self.spectator.tick()
+
+    def update_race(self):
+        """对战模式:收到种子后开局,之后每帧上报进度,结束时提交操作日志"""
+        race = self.race
+        if race.seed is None: return
+        if self.model.seed != race.seed:
+            # 所有玩家使用同一个种子和同一个起始格,保证棋盘完全一致
+            cfg = race.config
+            self.model.close()
+            self.model = engine.create(cfg['name'], cfg['r'], cfg['c'], cfg['m'], seed=race.seed)
+            self.setup()
+            if self.spectator: self.spectator.attach(self.model)
+            self.model.reveal(*race.start_cell)
+        if len(self.model.revealed) != self.race_sent:
+            self.race_sent = len(self.model.revealed)
+            race.send_progress(self.race_sent)
+        if (self.model.won or self.model.game_over) and not self.race_finished:
+            self.race_finished = True
+            race.send_finish(self.model.actions)
 
     def draw(self):
         """每帧刷新 (60FPS)"""
+        t0 = time.perf_counter()
         background('#2c3e50')
         self.renderer.render() # 绘制游戏界面
+        self.draw_clear_button()
+        if self.race: self.draw_race_status()
         
         # 如果游戏结束,绘制覆盖层
+        if (self.model.game_over or self.model.won) and not self.replay_saved:
+            self.replay_saved = True
+            # 胜局的回放等玩家输入名字后再写 (见 handle_win),败局沿用最近一次的名字
+            if self.model.game_over: ReplayArchive.append(self.model, self.player_name)
+            if self.telemetry: self.telemetry.game(self.model)
         if self.model.game_over: 
             self.draw_overlay("GAME OVER", '#e74c3c')
         elif self.model.won:
             self.draw_overlay("YOU WIN!", '#27ae60')
             if not self.record_saved: self.handle_win()
+        
+        if self.telemetry: self.telemetry.frame(time.perf_counter() - t0, self.input_seconds)
+        if self.scheduler.frame_done(self.frame_key(), self.can_idle()): self.go_idle()
+
+    def frame_key(self):
+        """本帧可见内容的摘要:计时器秒数、剩余雷数、胜负状态"""
+        m = self.model
+        return (int(m.get_duration()), len(m.flags), m.game_over, m.won)
+
+    def can_idle(self):
+        """对战/观战需要持续收发,动画与按住的手指 (长按识别) 需要逐帧推进"""
+        if self.race or self.spectator or self.worker.pending: return False
+        if self.renderer.animator and self.renderer.animator.layers: return False
+        return not self.gestures.touches and not self.gestures.events
+
+    def go_idle(self):
+        """暂停 Scene;计时器在走时预约在下一次跳秒时唤醒"""
+        self.paused = True
+        m = self.model
+        if m.start_time is not None and not (m.game_over or m.won):
+            ui.delay(self.wake, self.scheduler.next_tick_delay(m.get_duration()))
+
+    def wake(self):
+        self.scheduler.invalidate()
+        if self.paused: self.paused = False
+
+    def draw_race_status(self):
+        """在 HUD 中部显示对手进度"""
+        race = self.race
+        if race.seed is None:
+            msg = f'{race.error} · 点击返回菜单' if race.error else '等待对手加入...'
+        elif race.error and race.ranking is None:
+            msg = race.error # 开局后掉线:棋局照常进行,只是收不到对手的进度
+        else:
+            total = self.model.rows * self.model.cols - self.model.mines
+            parts = []
+            for name in race.players:
+                if name == race.name: continue
+                if name in race.results:
+                    t = race.results[name]
+                    parts.append(f"{name} {'❌' if t is None else f'{t:.1f}s'}")
+                else:
+                    parts.append(f"{name} {100 * race.progress.get(name, 0) // total}%")
+            msg = '  '.join(parts)
+        tint('white'); text(msg, 'Helvetica', 16, self.size.w/2, self.size.h - 30)
+
+    def draw_clear_button(self):
+        """全盘清扫会一次翻开很多格子,只放在这个显式的按钮上,不与格子上的手势混用"""
+        size = 44
+        self.btn_clear_rect = Rect(self.size.w - 110 - size/2, self.size.h - 30 - size/2, size, size)
+        tint('white'); text('🧹', 'Helvetica', 28, self.size.w - 110, self.size.h - 30)
 
     def draw_overlay(self, msg, color):
         """绘制结算界面的遮罩和按钮"""
@@ -82,104 +220,228 @@ class MinesweeperGame(Scene):
     def handle_win(self):
         """处理胜利逻辑:播放音效、保存记录"""
         self.record_saved = True
-        sound.play_effect('digital:PowerUp7')
+        audio.play('digital:PowerUp7')
         HapticFeedback.notification(0) # 震动:成功
         
-        duration = self.model.get_duration()
+        # 回调在帧循环之外执行,届时 self.model 可能已被重开替换:需要的数据现在就取好
+        model = self.model
+        diff_name = model.diff_name
+        duration = model.get_duration()
+        record = score_record(model) # 胜利瞬间的指标快照 (3BV、3BV/s、IOE)
         def show_input():
-            if not self.model.won: return
-            # 弹出名字输入框
-            name = dialogs.input_alert('恭喜胜利!', f'耗时: {int(duration)}秒', '玩家1')
+            if self.model is not model: # 已经重开,不再弹窗,回放记在最近一次的名字下
+                ReplayArchive.append(model, self.player_name)
+                return
+            # 弹出名字输入框;无论是否取消,回放都在知道名字之后写入
+            try:
+                name = dialogs.input_alert('恭喜胜利!', f"耗时: {int(duration)}秒  3BV/s: {record.get('3bv/s', 0):.2f}", self.player_name)
+            except KeyboardInterrupt: # 取消输入
+                name = None
+            if name: self.player_name = name
+            ReplayArchive.append(model, self.player_name)
             if name:
-                is_best = ScoreManager.save_score(self.model.diff_name, name, duration)
+                is_best = ScoreManager.save_score(diff_name, name, duration, record)
+                if self.leaderboard: self.leaderboard.submit(diff_name, name, duration, record)
                 console.hud_alert('新纪录!' if is_best else '记录已保存')
         ui.delay(show_input, 0.2)
         
     def restart_game(self):
         """原地重开游戏"""
-        sound.play_effect('ui:switch33')
+        audio.play('ui:switch33')
+        self.race = None # 重玩即退出对战,转为普通练习
         # 重置 Model 和 Renderer
-        self.model = MinesweeperModel(self.diff_name, self.rows, self.cols, self.mines)
-        self.renderer = GameRenderer(self, self.model)
+        self.model.close() # 临时磁盘棋盘在这里删除文件
+        self.model = engine.create(self.diff_name, self.rows, self.cols, self.mines, topology=self.topology)
+        self.setup()
+        if self.spectator: self.spectator.attach(self.model)
         self.record_saved = False
-        self.last_tap = {'pos': None, 'time': 0}
+        self.replay_saved = False
+        self.generating = False
+        self.gestures.reset()
         self.busy = False
 
+    def back_to_menu(self):
+        """关闭场景并释放所有后台资源,然后重新打开菜单"""
+        audio.play('ui:switch33')
+        if self.spectator: self.spectator.stop() # 释放观战端口
+        self.worker.stop()
+        if self.telemetry: self.telemetry.stop() # 写完缓冲
+        self.view.close()
+        self.model.close() # 视图关闭后不会再绘制它
+        
+        # 动态导入 main 以避免循环引用 (Controller -> Main -> Controller)
+        import main
+        def safe_open():
+            try: main.show_menu()
+            except: ui.delay(safe_open, 0.5)
+        ui.delay(safe_open, 0.5)
+
     def touch_began(self, touch):
         """处理触摸事件"""
         if self.busy: return # 防止连点
+        if self.race and self.race.seed is None:
+            # 对战尚未开局;连接已经失败时点击任意处返回菜单
+            if self.race.error: self.busy = True; self.back_to_menu()
+            return
 
         # --- 游戏结束状态下的点击 ---
         if self.model.game_over or self.model.won:
             if self.btn_restart_rect.contains_point(touch.location):
                 self.busy = True; self.restart_game()
             elif self.btn_menu_rect.contains_point(touch.location):
-                self.busy = True; sound.play_effect('ui:switch33')
-                self.view.close()
-                
-                # 动态导入 main 以避免循环引用 (Controller -> Main -> Controller)
-                import main
-                def safe_open():
-                    try: main.show_menu()
-                    except: ui.delay(safe_open, 0.5)
-                ui.delay(safe_open, 0.5)
+                self.busy = True; self.back_to_menu()
             return
             
-        # --- 游戏进行中的点击 ---
-        ox, oy = self.grid_origin
-        tx, ty = touch.location.x, touch.location.y
-        # 边界检查
-        if tx < ox or ty < oy: return
-        
-        # 屏幕坐标 -> 网格坐标转换
-        c = int((tx - ox) / self.tile_size)
-        r = self.model.rows - 1 - int((ty - oy) / self.tile_size)
-        if not (0 <= r < self.model.rows and 0 <= c < self.model.cols): return
+        # --- 点击顶部信息栏:清扫按钮执行全盘清扫,其余位置后台计算提示 ---
+        if touch.location.y > self.size.h - self.renderer.hud_height:
+            if self.btn_clear_rect.contains_point(touch.location):
+                self.clear_requested = True # 与手势一样留到 update 中执行
+                self.wake()
+            else:
+                self.request_hint()
+            return
+            
+        # --- 游戏进行中的点击:只入队,不在这里修改 Model ---
+        self.wake()
+        self.gestures.push(DOWN, touch.touch_id, touch.location.x, touch.location.y, time.time())
+
+    def touch_moved(self, touch):
+        self.wake()
+        self.gestures.push(MOVE, touch.touch_id, touch.location.x, touch.location.y, time.time())
+
+    def touch_ended(self, touch):
+        self.wake()
+        self.gestures.push(UP, touch.touch_id, touch.location.x, touch.location.y, time.time())
 
-        curr_time = time.time()
+    def request_hint(self):
+        """提交提示分析;结果在之后某一帧的 update 中发布"""
+        if self.model.first_move: return
+        self.wake()
+        self.worker.submit(pattern_hints, self.show_hint)
+
+    def show_hint(self, result):
+        self.renderer.hints = result
+        audio.play('ui:click3' if result['safe'] else 'ui:click1')
+
+    def process_input(self):
+        """每帧一次:识别手势,批量修改 Model,最后只播放一次反馈;返回处理的手势数"""
+        gestures = self.gestures.process(time.time())
+        clear, self.clear_requested = self.clear_requested, False
+        if self.generating: gestures, clear = [], False # 雷区生成期间丢弃输入,Model 只由生成线程写入
+        for g in gestures:
+            # 拖动 / 捏合只移动视口,对局结束后也可以查看棋盘
+            if g.kind == PAN: self.renderer.pan_by(g.x, g.y)
+            elif g.kind == ZOOM: self.renderer.zoom_at(g.scale, g.x, g.y)
+            elif not (self.model.game_over or self.model.won): self.apply_gesture(g)
+        if clear and not (self.model.game_over or self.model.won): self.try_clear_all()
+        self.flush_feedback()
+        return len(gestures) + clear
+
+    def apply_gesture(self, g):
+        """
+        手势 -> 操作:
+        单击或双击数字 = Chord (只影响该数字周围;全盘清扫在顶部信息栏的按钮上);
+        单击未翻开格子 = 切换标记,双击或长按 = 强制翻开 (先移除标记)。
+        """
+        r, c = g.target
+        is_number = (r, c) in self.model.revealed and self.model.grid[r][c] > 0
         
-        # 1. 逻辑:点击已翻开的数字 -> 尝试自动开雷 (Chord)
-        if (r, c) in self.model.revealed and self.model.grid[r][c] > 0:
+        if is_number:
             self.try_auto_reveal(r, c)
-            
-        # 2. 逻辑:双击 -> 强制翻开
-        elif self.last_tap['pos'] == (r, c) and (curr_time - self.last_tap['time'] < 0.3):
-            # 如果双击了插旗/问号的格子,先移除标记再翻开
-            if (r, c) in self.model.flags: self.model.flags.remove((r, c))
-            if (r, c) in self.model.questions: self.model.questions.remove((r, c))
+        elif (r, c) in self.model.revealed:
+            return
+        elif g.kind in (DOUBLE_TAP, LONG_PRESS):
+            self.model.clear_mark(r, c)
             self.do_reveal(r, c)
-            
-        # 3. 逻辑:单击 -> 切换标记状态 (三段循环)
-        elif not ((r, c) in self.model.revealed):
+        elif g.kind == TAP:
+            # 单击 -> 切换标记状态 (三段循环)
             state = self.model.toggle_flag(r, c)
-            # 播放对应的音效和震动
-            if state == 'flag': 
-                sound.play_effect('ui:switch9'); HapticFeedback.impact(1)
-            elif state == 'question': 
-                sound.play_effect('ui:switch10'); HapticFeedback.impact(0)
-            else: 
-                sound.play_effect('ui:click1')
-            
-        self.last_tap = {'pos': (r, c), 'time': curr_time}
+            self.queue_feedback('mark_none' if state == 'none' else state)
+
+    def queue_feedback(self, kind):
+        if self.feedback is None or FEEDBACK[kind][0] > FEEDBACK[self.feedback][0]:
+            self.feedback = kind
+
+    def flush_feedback(self):
+        if self.feedback is None: return
+        _, effect, haptic = FEEDBACK[self.feedback]
+        self.feedback = None
+        audio.play(effect)
+        if haptic:
+            getattr(HapticFeedback, haptic[0])(haptic[1])
 
     def do_reveal(self, r, c):
-        """执行翻开并播放结果音效"""
+        """执行翻开并登记结果反馈;首击先在后台生成雷区"""
+        if self.model.first_move and self.model.pregenerated is None:
+            self.start_generation(r, c)
+            return
         self.model.reveal(r, c)
-        if self.model.game_over:
-            sound.play_effect('arcade:Explosion_1'); HapticFeedback.notification(2)
-        else:
-            sound.play_effect('ui:click2'); HapticFeedback.impact(0)
+        self.queue_feedback('explode' if self.model.game_over else 'reveal')
+
+    def start_generation(self, r, c):
+        """后台生成雷区,帧循环照常运行;完成后在帧边界执行真正的首次翻开"""
+        self.generating = True
+        self.renderer.status = '生成雷区'
+        model = self.model
+        def job(cancelled):
+            model.pregenerate(r, c)
+            return True
+        self.worker.run(job, lambda _: self.finish_generation(r, c),
+                        errback=lambda error: self.generation_failed(model, error))
+
+    def finish_generation(self, r, c):
+        self.generating = False
+        self.renderer.status = None
+        self.do_reveal(r, c)
+
+    def generation_failed(self, model, error):
+        """
+        生成任务抛出异常或已过期:解除输入锁,换一份同 seed 的空棋盘 (旧棋盘可能只写了一半),
+        玩家再点一次即重新生成。对局已被替换时 setup() 早已复位,不需要处理。
+        """
+        if self.model is not model: return
+        model.close()
+        self.model = engine.create(model.diff_name, model.rows, model.cols, model.mines, seed=model.seed,
+                                   topology=self.topology)
+        self.setup()
+        if self.spectator: self.spectator.attach(self.model)
+        if error is not None: console.hud_alert('生成雷区失败,请重试', 'error')
 
     def try_auto_reveal(self, r, c):
-        """数字自动翻开逻辑"""
-        flags_cnt = self.model.count_around(r, c, lambda nr, nc: (nr, nc) in self.model.flags)
-        if flags_cnt == self.model.grid[r][c]:
-            sound.play_effect('ui:click2'); HapticFeedback.impact(1)
-            for dr in [-1, 0, 1]:
-                for dc in [-1, 0, 1]:
-                    nr, nc = r+dr, c+dc
-                    if 0 <= nr < self.model.rows and 0 <= nc < self.model.cols:
-                        if (nr, nc) not in self.model.flags and (nr, nc) not in self.model.questions:
-                            self.model.reveal(nr, nc)
-            if self.model.game_over:
-                sound.play_effect('arcade:Explosion_1'); HapticFeedback.notification(2)
+        """数字自动翻开逻辑 (由 Model 批量完成)"""
+        if self.model.chord(r, c): self.play_chord_feedback()
+
+    def try_clear_all(self):
+        """全盘清扫:对所有已满足的数字格反复 Chord"""
+        if self.model.clear_satisfied(): self.play_chord_feedback()
+
+    def play_chord_feedback(self):
+        self.queue_feedback('explode' if self.model.game_over else 'chord')
+
+class SpectatorScene(Scene):
+    """观众端场景:连接观战服务器,用同一个 GameRenderer 绘制镜像棋盘"""
+    
+    def __init__(self, host, port=8765):
+        super().__init__()
+        # 延迟导入,普通对局不需要加载 asyncio
+        from spectator import SpectatorClient
+        self.client = SpectatorClient(host, port)
+        self.grid_origin = (0, 0)
+        self.tile_size = 0
+        self.renderer = None
+
+    def setup(self):
+        self.renderer = GameRenderer(self, self.client.board)
+        self.client.start()
+
+    def draw(self):
+        background('#2c3e50')
+        board = self.client.board
+        error = self.client.error
+        if not board.rows:
+            tint('white'); text(error or '等待关键帧...', 'Helvetica-Bold', 24, self.size.w/2, self.size.h/2)
+            return
+        self.tile_size = min(self.size.w / board.cols, (self.size.h - 60) / board.rows)
+        self.renderer.render()
+        # 断线后保留最后的画面,在 HUD 中部说明原因
+        if error: tint('white'); text(error, 'Helvetica', 16, self.size.w/2, self.size.h - 30)
@@ -0,0 +1,213 @@
+import mmap
+import os
+import re
+import struct
+import tempfile
+
+# ==========================================
+# 磁盘棋盘:每格 1 字节的内存映射文件
+# ==========================================
+# 用于数十亿格的马拉松棋盘:内存里放不下 grid,连雷的下标集合都放不下。
+# 文件 = 4 KB 文件头 + 每格 1 字节,按行优先排列:
+#   bit 0-4  周围雷数 + 1 (0 表示还没算过;立体拓扑最多 26 个邻居)
+#   bit 5    雷
+#   bit 6-7  状态:0 未翻开 / 1 已翻开 / 2 旗帜 / 3 问号
+# 新文件是稀疏文件,全 0 恰好表示“无雷、未计算、未翻开”,所以只有碰过的页才占内存和磁盘。
+# 数字在第一次读取时才数邻居算出并写回;操作系统按需换入换出,常驻内存只有最近访问的页。
+# 所有状态 (含文件头里的计数、胜负与局面哈希) 都直接写在映射上,存档只是一次 flush,读档只是重新映射。
+
+HEADER = 4096
+_MAGIC = b'MSDB\x02'
+# 魔数, 行, 列, 雷数, seed, 首击下标 (-1 未生成), 已翻开/旗帜/问号计数, 胜负 (0/1 输/2 赢), 已用秒数, 拓扑, 难度名,
+# 局面 Zobrist 哈希 (0 表示尚未写入,见 MinesweeperModel.rehash)
+_HEAD = struct.Struct('!5sQQQQqQQQBd32s64sQ')
+# 运行中会改写的字段及其在文件头里的偏移
+_SAFE, _SAFE_AT = struct.Struct('!q'), struct.calcsize('!5sQQQQ')
+_COUNTS, _COUNTS_AT = struct.Struct('!QQQ'), struct.calcsize('!5sQQQQq')
+_STATUS, _STATUS_AT = struct.Struct('!Bd'), struct.calcsize('!5sQQQQqQQQ')
+_ZOBRIST, _ZOBRIST_AT = struct.Struct('!Q'), struct.calcsize('!5sQQQQqQQQBd32s64s')
+
+COUNT_MASK, MINE = 0x1F, 0x20
+HIDDEN, REVEALED, FLAG, QUESTION = 0, 1, 2, 3
+
+# 生成雷区时每个条带的格子数 (条带内的抽样集合常驻内存)
+BAND_CELLS = 1 << 20
+
+# 每种状态的字节取值范围,迭代时用正则在映射上做 C 速度的扫描
+_STATE_RE = [re.compile(b'[\\x%02x-\\x%02x]' % (s << 6, (s << 6) | 0x3F)) for s in range(4)]
+
+
+class _DiskRow:
+    __slots__ = ('board', 'base')
+
+    def __init__(self, board, base):
+        self.board = board
+        self.base = base
+
+    def __len__(self):
+        return self.board.cols
+
+    def __getitem__(self, c):
+        return self.board.value(self.base + c)
+
+
+class _StateSet:
+    """某一状态的格子集合视图,支持 in / len / 迭代 / add / remove / discard,元素为 (r, c)"""
+
+    def __init__(self, board, state):
+        self.board = board
+        self.state = state
+
+    def __contains__(self, pos):
+        r, c = pos
+        return self.board.mm[HEADER + r * self.board.cols + c] >> 6 == self.state
+
+    def __len__(self):
+        return self.board.counts[self.state]
+
+    def __iter__(self):
+        cols = self.board.cols
+        for m in _STATE_RE[self.state].finditer(self.board.mm, HEADER):
+            yield divmod(m.start() - HEADER, cols)
+
+    def add(self, pos):
+        self.board.set_state(pos[0] * self.board.cols + pos[1], self.state)
+
+    def remove(self, pos):
+        if pos not in self: raise KeyError(pos)
+        self.board.set_state(pos[0] * self.board.cols + pos[1], HIDDEN)
+
+    def discard(self, pos):
+        if pos in self: self.board.set_state(pos[0] * self.board.cols + pos[1], HIDDEN)
+
+
+class DiskBoard:
+    """
+    内存映射的棋盘文件,兼容 grid[r][c] 读法 (-1 为雷),
+    revealed / flags / questions 为状态集合视图。用 create 新建,open 读档。
+    """
+
+    def __init__(self, path, f, nb_factory):
+        self.path = path
+        self.f = f
+        self.temporary = False # create(None, ...) 建的临时文件,close 时删除
+        self.mm = mmap.mmap(f.fileno(), 0)
+        (magic, self.rows, self.cols, self.mines, self.seed, self.safe, n_rev, n_flag, n_q,
+         self.status, self.elapsed, topology, name, self.zobrist) = _HEAD.unpack_from(self.mm, 0)
+        if magic != _MAGIC: raise ValueError(f'不是磁盘棋盘文件: {path}')
+        self.topology = topology.rstrip(b'\0').decode()
+        self.diff_name = name.rstrip(b'\0').decode(errors='ignore') # 名字可能在多字节字符中间被截断
+        self.counts = [0, n_rev, n_flag, n_q]
+        self.nb = nb_factory(self.rows, self.cols, self.topology)
+        self.revealed = _StateSet(self, REVEALED)
+        self.flags = _StateSet(self, FLAG)
+        self.questions = _StateSet(self, QUESTION)
+
+    @classmethod
+    def create(cls, path, diff_name, rows, cols, mines, seed, topology, nb_factory):
+        """
+        新建棋盘文件 (稀疏,不预先写任何格子);path 为 None 时用临时文件。
+        nb_factory(rows, cols, topology) 构造邻接查询 (如 topology.LazyNeighbourTable)。
+        """
+        if not 0 <= seed < 1 << 64: raise ValueError('磁盘棋盘的 seed 必须是 64 位非负整数')
+        temporary = path is None
+        if temporary:
+            fd, path = tempfile.mkstemp(prefix='minesweeper_', suffix='.board')
+            f = os.fdopen(fd, 'w+b')
+        else:
+            f = open(path, 'w+b')
+        f.truncate(HEADER + rows * cols)
+        f.write(_HEAD.pack(_MAGIC, rows, cols, mines, seed, -1, 0, 0, 0, 0, 0.0,
+                           topology.encode(), diff_name.encode()[:64], 0))
+        f.flush()
+        board = cls(path, f, nb_factory)
+        board.temporary = temporary
+        return board
+
+    @classmethod
+    def open(cls, path, nb_factory):
+        """打开已有的棋盘文件 (读档),不读取任何格子"""
+        return cls(path, open(path, 'r+b'), nb_factory)
+
+    # ---- grid 接口 ----
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, r):
+        return _DiskRow(self, r * self.cols)
+
+    def value(self, i):
+        """格子的值:-1 为雷,否则为周围雷数 (第一次读取时计算并写回文件)"""
+        mm = self.mm
+        b = mm[HEADER + i]
+        if b & MINE: return -1
+        if b & COUNT_MASK: return (b & COUNT_MASK) - 1
+        v = sum(1 for j in self.nb.neighbour_indices(i) if mm[HEADER + j] & MINE)
+        mm[HEADER + i] = b | (v + 1)
+        return v
+
+    def set_state(self, i, state):
+        b = self.mm[HEADER + i]
+        old = b >> 6
+        if old == state: return
+        self.mm[HEADER + i] = (b & 0x3F) | (state << 6)
+        counts = self.counts
+        if old: counts[old] -= 1
+        if state: counts[state] += 1
+        _COUNTS.pack_into(self.mm, _COUNTS_AT, counts[1], counts[2], counts[3])
+
+    def set_zobrist(self, h):
+        """局面哈希随每次变更写进文件头,读档时不必扫描全盘重算"""
+        self.zobrist = h
+        _ZOBRIST.pack_into(self.mm, _ZOBRIST_AT, h)
+
+    # ---- 生成 ----
+    @property
+    def generated(self):
+        return self.safe >= 0
+
+    def generate(self, rng, safe, progress=None):
+        """
+        按行条带流式布雷,首击下标 safe 不是雷,内存只需一个条带的抽样集合。
+        雷数按条带分层分配 (前 k 个候选格累计分到 mines * k // (格子数 - 1) 颗),
+        条带内均匀抽样;整盘雷数精确,局部密度比完全均匀抽样更平稳。
+        与内存棋盘的抽样方式不同:同一 seed 在两种模式下得到的雷区不同。
+        progress(已完成比例) 在每个条带写完后调用 (可为 None)。
+        """
+        mm, n, mines, cols = self.mm, self.rows * self.cols, self.mines, self.cols
+        band = max(1, BAND_CELLS // cols) * cols
+        quota = lambda k: mines * k // (n - 1)
+        before = 0 # 已处理的候选格数 (不含 safe)
+        for a in range(0, n, band):
+            b = min(n, a + band)
+            size = b - a - (1 if a <= safe < b else 0)
+            skip = safe - a # 条带内的首击偏移 (不在条带内时为负或越界,不影响判断)
+            for k in rng.sample(range(size), quota(before + size) - quota(before)):
+                if 0 <= skip <= k: k += 1
+                mm[HEADER + a + k] |= MINE # 保留首击前就插下的旗帜 / 问号 (状态位)
+            before += size
+            if progress: progress(b / n)
+        self.safe = safe
+        self.sync()
+
+    # ---- 存档 ----
+    def sync(self, status=None, elapsed=None):
+        """把胜负与已用时间写进文件头并刷盘 (只写脏页)"""
+        if status is not None: self.status = status
+        if elapsed is not None: self.elapsed = elapsed
+        _SAFE.pack_into(self.mm, _SAFE_AT, self.safe)
+        _STATUS.pack_into(self.mm, _STATUS_AT, self.status, self.elapsed)
+        self.mm.flush()
+
+    def close(self, delete=None):
+        """
+        解除映射并关闭文件 (可重复调用)。
+        delete 为 None 时临时棋盘删除文件、存档棋盘保留;也可显式指定。
+        """
+        if self.mm.closed: return
+        if delete is None: delete = self.temporary
+        if not delete: self.mm.flush()
+        self.mm.close()
+        self.f.close()
+        if delete: os.unlink(self.path)
+
@@ -0,0 +1,134 @@
+import abc
+import importlib
+
+# ==========================================
+# 棋盘引擎接口 + 后端注册表
+# ==========================================
+# 控制器、渲染器、观战与对战只通过 BoardEngine 规定的成员访问棋盘,
+# 因此任何实现了这套接口的后端 (列表、位棋盘、NumPy ...) 都可以在运行时替换。
+# 新后端上线前请用 conformance.py 与 reference 后端做差分对比。
+
+
+class BoardEngine(abc.ABC):
+    """
+    棋盘引擎的正式接口 (MinesweeperModel 为参考实现)。
+
+    只读状态:
+        diff_name, rows, cols, mines, seed, topology (见 topology.py)
+        grid[r][c]                 -1 为雷,其余为周围雷数 (上限取决于拓扑;只保证已翻开的格子可以读取)
+        revealed / flags / questions  支持 in / len / 迭代的 (r, c) 集合
+        game_over, won, first_move, start_time, end_time
+        actions                    操作日志 [(毫秒, 操作, r, c)],格式见 MinesweeperModel
+        pregenerated               已预先生成雷区的首击格子,没有时为 None
+        generation                 pregenerate 进行中的进度 (阶段名, 0-1),其余时候为 None
+        zobrist                    玩家可见局面的 64 位 Zobrist 哈希 (见 model.zobrist_key),
+                                   同一可见局面在任何后端上都必须相同
+
+    变更集:
+        reveal / chord / clear_satisfied 返回本次新翻开的 (r, c) 列表 (顺序不作要求),
+        toggle_flag 返回新标记状态 'flag' / 'question' / 'none' (已翻开的格子返回 None);
+        同样的变更集也通过 add_listener 注册的回调广播,见 MinesweeperModel.add_listener。
+
+    确定性:同一 seed、同一首击位置必须生成与参考实现完全相同的雷区,
+    这样对战、回放与差分测试才能在不同后端之间通用。
+
+    邻接:
+        neighbours(r, c) 返回该格所有邻居 (r, c) 的序列 (由拓扑决定,见 topology.py);
+        count_around(r, c, condition_func) 返回满足 condition_func(nr, nc) 的邻居个数。
+
+    类属性 TOPOLOGIES 列出后端支持的拓扑种类 (见 topology.py),None 表示全部支持。
+    所有接口方法都是抽象方法,漏实现任何一个的后端在实例化时就会抛出 TypeError。
+    """
+    TOPOLOGIES = None
+
+    @abc.abstractmethod
+    def add_listener(self, fn):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def remove_listener(self, fn):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def reveal(self, r, c):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def toggle_flag(self, r, c):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def clear_mark(self, r, c):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def chord(self, r, c):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def clear_satisfied(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def pregenerate(self, safe_r, safe_c):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def neighbours(self, r, c):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def count_around(self, r, c, condition_func):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_duration(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_metrics(self):
+        raise NotImplementedError
+
+    def close(self):
+        """对局被丢弃时由控制器调用,释放文件等外部资源;默认什么也不做"""
+
+
+# 后端名 -> (模块, 类名);按需导入,未用到的后端不会被加载
+BACKENDS = {
+    'reference': ('model', 'MinesweeperModel'),
+    'bitboard': ('bitboard', 'BitboardModel'),
+}
+
+# 新对局默认使用的后端,可在运行时通过 set_backend 切换
+default_backend = 'reference'
+
+
+def register_backend(name, module, class_name):
+    """注册新后端 (例如实验中的 NumPy 引擎)"""
+    BACKENDS[name] = (module, class_name)
+
+
+def get_backend(name=None):
+    """按名字取后端类;None 表示当前默认后端"""
+    name = name or default_backend
+    if name not in BACKENDS: raise ValueError(f'未知的棋盘后端: {name}')
+    module, class_name = BACKENDS[name]
+    return getattr(importlib.import_module(module), class_name)
+
+
+def set_backend(name):
+    """切换默认后端 (之后新建的对局生效)"""
+    global default_backend
+    get_backend(name) # 先确认能导入
+    default_backend = name
+
+
+def supports(topology, backend=None):
+    """指定 (或默认) 后端是否支持该拓扑"""
+    kinds = get_backend(backend).TOPOLOGIES
+    return kinds is None or topology.partition(':')[0] in kinds
+
+
+def create(difficulty_name, rows, cols, mines, seed=None, backend=None, topology='grid'):
+    """用指定 (或默认) 后端新建一局;不支持该拓扑的后端抛出 ValueError"""
+    return get_backend(backend)(difficulty_name, rows, cols, mines, seed=seed, topology=topology)
@@ -0,0 +1,141 @@
+import collections
+
+# ==========================================
+# 输入事件队列 + 手势识别
+# ==========================================
+# Scene 的 touch_* 回调只负责把原始事件 (带时间戳) 塞进队列,
+# 每帧在 update() 中调用一次 process(),统一识别成手势并交给控制器批量处理。
+
+TAP = 'tap'
+DOUBLE_TAP = 'double_tap'
+LONG_PRESS = 'long_press'
+PAN = 'pan'     # 单指拖动:x / y 为本帧累计位移
+ZOOM = 'zoom'   # 双指捏合:x / y 为缩放中心,scale 为本帧累计缩放比
+
+DOWN, MOVE, UP = 'down', 'move', 'up'
+
+Gesture = collections.namedtuple('Gesture', 'kind target x y time scale', defaults=(1.0,))
+
+
+class _Touch:
+    __slots__ = ('x', 'y', 't', 'target', 'moved', 'consumed', 'lx', 'ly')
+
+    def __init__(self, x, y, t, target):
+        self.x, self.y, self.t = x, y, t
+        self.lx, self.ly = x, y  # 上一次的位置,用于计算拖动 / 捏合的增量
+        self.target = target
+        self.moved = False     # 移动超出容差后不再识别为点击/长按
+        self.consumed = False  # 已作为双击或长按触发,抬起时不再产生单击
+
+
+class GestureRecognizer:
+    """
+    单击 / 双击 / 长按 / 拖动 / 捏合识别器。
+    第二根手指按下后,所有触点都不再产生单击 / 双击 / 长按,只参与捏合。
+    :param hit_test: 屏幕坐标 -> 目标 (通常是格子坐标) 的函数,返回 None 表示无效区域
+    :param double_tap_interval: 两次按下间隔小于该值且落在同一目标上视为双击 (秒)
+    :param long_press_duration: 按住超过该时长视为长按 (秒)
+    :param move_tolerance: 按下后移动超过该距离 (点) 即取消点击识别
+    """
+
+    def __init__(self, hit_test, double_tap_interval=0.3, long_press_duration=0.5, move_tolerance=12):
+        self.hit_test = hit_test
+        self.double_tap_interval = double_tap_interval
+        self.long_press_duration = long_press_duration
+        self.move_tolerance = move_tolerance
+        self.events = collections.deque()
+        self.touches = {}      # touch_id -> _Touch
+        self.last_down = None  # (目标, 时间),用于双击判断
+
+    def push(self, kind, touch_id, x, y, t):
+        """由 touch_began / touch_moved / touch_ended 调用,只做 O(1) 入队"""
+        self.events.append((kind, touch_id, x, y, t))
+
+    def reset(self):
+        self.events.clear()
+        self.touches.clear()
+        self.last_down = None
+
+    def _coalesce(self):
+        """取出本帧全部事件,同一触点连续的 move 只保留最后一个"""
+        out = []
+        while self.events:
+            ev = self.events.popleft()
+            if ev[0] == MOVE and out and out[-1][0] == MOVE and out[-1][1] == ev[1]:
+                out[-1] = ev
+            else:
+                out.append(ev)
+        return out
+
+    def process(self, now):
+        """
+        每帧调用一次,返回本帧识别出的手势列表 (按时间顺序)。
+        同一帧内对同一目标的重复手势会被合并 (例如快速连点只保留一次单击)。
+        """
+        gestures = []
+        dx = dy = 0.0
+        scale, center = 1.0, None
+        for kind, tid, x, y, t in self._coalesce():
+            if kind == DOWN:
+                target = self.hit_test(x, y)
+                touch = self.touches[tid] = _Touch(x, y, t, target)
+                if len(self.touches) > 1:
+                    for other in self.touches.values(): other.consumed = True
+                    self.last_down = None
+                    continue
+                if target is None: continue
+                last = self.last_down
+                if last and last[0] == target and t - last[1] < self.double_tap_interval:
+                    # 第二次按下立即触发双击,响应不必等到抬起
+                    touch.consumed = True
+                    self.last_down = None
+                    gestures.append(Gesture(DOUBLE_TAP, target, x, y, t))
+                else:
+                    self.last_down = (target, t)
+            elif kind == MOVE:
+                touch = self.touches.get(tid)
+                if touch is None: continue
+                if abs(x - touch.x) + abs(y - touch.y) > self.move_tolerance:
+                    touch.moved = True
+                if len(self.touches) == 2:
+                    other = next(o for o in self.touches.values() if o is not touch)
+                    before = abs(complex(touch.lx - other.lx, touch.ly - other.ly))
+                    after = abs(complex(x - other.lx, y - other.ly))
+                    if before > 0: scale *= after / before
+                    center = ((x + other.lx) / 2, (y + other.ly) / 2)
+                    dx += (x - touch.lx) / 2
+                    dy += (y - touch.ly) / 2
+                elif len(self.touches) == 1 and touch.moved:
+                    dx += x - touch.lx
+                    dy += y - touch.ly
+                touch.lx, touch.ly = x, y
+            elif kind == UP:
+                touch = self.touches.pop(tid, None)
+                if touch is None or touch.target is None or touch.moved or touch.consumed: continue
+                gestures.append(Gesture(TAP, touch.target, touch.x, touch.y, touch.t))
+
+        # 仍按住的触点:超过阈值即触发长按 (只触发一次)
+        for touch in self.touches.values():
+            if touch.target is None or touch.moved or touch.consumed: continue
+            if now - touch.t >= self.long_press_duration:
+                touch.consumed = True
+                self.last_down = None
+                gestures.append(Gesture(LONG_PRESS, touch.target, touch.x, touch.y, touch.t))
+
+        gestures = self._dedupe(gestures)
+        # 拖动与捏合每帧各合并成一个手势
+        if dx or dy: gestures.append(Gesture(PAN, None, dx, dy, now))
+        if center is not None and scale != 1.0: gestures.append(Gesture(ZOOM, None, center[0], center[1], now, scale))
+        return gestures
+
+    @staticmethod
+    def _dedupe(gestures):
+        """同一帧里对同一目标的同类手势只保留一个"""
+        seen = set()
+        out = []
+        for g in gestures:
+            key = (g.kind, g.target)
+            if key in seen: continue
+            seen.add(key)
+            out.append(g)
+        return out
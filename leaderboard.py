@@ -0,0 +1,282 @@
+import http.client
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+# ==========================================
+# 在线排行榜:离线队列 + 批量上传 + 长连接复用 + TTL 缓存
+# ==========================================
+# 协议 (JSON over HTTP/1.1):
+#   POST {base}/scores                 请求体 [{"id", "difficulty", "name", "time", "metrics"}, ...]
+#                                      返回 {"accepted": n};按 id 去重,重复上传是安全的
+#   GET  {base}/scores?difficulty=...  返回 [{"name", "time", "metrics"}, ...],按用时升序
+# 成绩先追加到本地队列文件,网络可用时由后台线程分批上传,上传成功后才从队列里删除,
+# 所以断网、闪退都不会丢成绩。读取只查内存缓存,过期时在后台刷新,界面线程从不等网络。
+# 失败分两种:网络错误、5xx、408/429 是暂时的,停下等下一次 sync 重试;
+# 其余 4xx 说明这批数据本身被拒绝,重试也不会成功,逐条重发找出坏记录,
+# 把它们移进隔离文件 (队列文件名 + '.rejected'),其余成绩照常上传,队列不会被一条坏记录堵死。
+# 本文件同时提供一个本地替身服务器 (LeaderboardServer),用于开发与联调。
+
+
+class RequestRejected(Exception):
+    """服务器明确拒绝了请求 (4xx,不含 408/429),原样重试不会成功"""
+
+    def __init__(self, status):
+        super().__init__(f'HTTP {status}')
+        self.status = status
+
+
+class LeaderboardClient:
+    """
+    :param host: 排行榜服务器地址
+    :param base: 接口路径前缀
+    :param batch: 每个请求最多上传多少条成绩
+    :param ttl: 排行榜缓存的有效期 (秒)
+    :param timeout: 单次网络请求超时 (秒)
+    """
+    QUEUE_PATH = 'minesweeper_upload_queue.jsonl'
+
+    def __init__(self, host, port=80, https=False, base='/api', batch=20, ttl=60, timeout=5, queue_path=None):
+        self.host = host
+        self.port = port
+        self.https = https
+        self.base = base.rstrip('/')
+        self.batch = batch
+        self.ttl = ttl
+        self.timeout = timeout
+        self.queue_path = queue_path or self.QUEUE_PATH
+        self.rejected_path = self.queue_path + '.rejected'
+
+        self.cache = {}          # 难度 -> (取回时间, 排行列表)
+        self.refreshing = set()  # 正在后台刷新的难度,避免重复请求
+        self.online = None       # 最近一次请求是否成功 (None 表示还没试过)
+        self.conn = None         # 长连接,只在后台线程使用
+        self.tasks = queue.Queue()
+        self.lock = threading.Lock() # 保护队列文件
+        self.thread = None
+
+    # ---- 界面线程调用 (都不阻塞) ----
+    def submit(self, difficulty, name, duration, metrics=None):
+        """记录一条成绩:先落盘到本地队列,再请求后台上传"""
+        rec = {'id': uuid.uuid4().hex, 'difficulty': difficulty, 'name': name,
+               'time': duration, 'metrics': metrics or {}}
+        with self.lock:
+            with open(self.queue_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + '\n')
+        self.sync()
+
+    def sync(self):
+        """请求后台把本地队列上传 (例如启动时、网络恢复后)"""
+        self._post_task(('sync',))
+
+    def top(self, difficulty):
+        """
+        返回缓存中的排行榜 (可能为 None 或已过期);过期或缺失时在后台刷新。
+        """
+        entry = self.cache.get(difficulty)
+        if (entry is None or time.time() - entry[0] > self.ttl) and difficulty not in self.refreshing:
+            self.refreshing.add(difficulty)
+            self._post_task(('refresh', difficulty))
+        return entry[1] if entry else None
+
+    def best_text(self, difficulty):
+        """菜单用的一行文字:在线第一名,没有数据时返回 None"""
+        board = self.top(difficulty)
+        if not board: return None
+        return f"🌐 {board[0]['name']}: {int(board[0]['time'])}s"
+
+    def pending(self):
+        """本地队列里尚未上传的成绩数"""
+        with self.lock:
+            return len(self._load_queue())
+
+    def close(self):
+        self._post_task(None)
+
+    # ---- 后台线程 ----
+    def _post_task(self, task):
+        if self.thread is None and task is not None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        self.tasks.put(task)
+
+    def _run(self):
+        while True:
+            task = self.tasks.get()
+            if task is None: break
+            if task[0] == 'sync': self._upload()
+            else:
+                difficulty = task[1]
+                try: board = self._request('GET', f'{self.base}/scores?difficulty={quote(difficulty)}')
+                except RequestRejected: board = None
+                if board is not None: self.cache[difficulty] = (time.time(), board)
+                self.refreshing.discard(difficulty)
+        if self.conn is not None: self.conn.close()
+        self.conn = None
+        self.thread = None
+
+    def _load_queue(self):
+        if not os.path.exists(self.queue_path): return []
+        out = []
+        with open(self.queue_path, encoding='utf-8') as f:
+            for line in f:
+                try: out.append(json.loads(line))
+                except ValueError: pass # 写到一半的行 (闪退) 直接丢弃
+        return out
+
+    def _upload(self):
+        """按批上传;暂时性失败就停下,剩余的留在队列里等下一次 sync;被拒绝的记录移进隔离文件"""
+        with self.lock:
+            items = self._load_queue()
+        sent, rejected = set(), []
+        for i in range(0, len(items), self.batch):
+            if not self._send_chunk(items[i:i + self.batch], sent, rejected): break
+        if not sent and not rejected: return
+        with self.lock:
+            if rejected:
+                with open(self.rejected_path, 'a', encoding='utf-8') as f:
+                    for rec in rejected: f.write(json.dumps(rec, ensure_ascii=False) + '\n')
+            done = sent | {rec['id'] for rec in rejected}
+            # 上传期间可能又有新成绩入队:只删掉已确认上传或已隔离的那些
+            rest = [rec for rec in self._load_queue() if rec['id'] not in done]
+            tmp = self.queue_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for rec in rest: f.write(json.dumps(rec, ensure_ascii=False) + '\n')
+            os.replace(tmp, self.queue_path)
+
+    def _send_chunk(self, chunk, sent, rejected):
+        """
+        上传一批成绩,成功的 id 加入 sent,被拒绝的记录加入 rejected。
+        整批被拒绝时逐条重发,只隔离真正有问题的记录。
+        :return: False 表示遇到暂时性失败,应停止本次上传
+        """
+        try:
+            if self._request('POST', f'{self.base}/scores', chunk) is None: return False
+        except RequestRejected:
+            if len(chunk) == 1:
+                rejected.extend(chunk)
+                return True
+            return all(self._send_chunk([rec], sent, rejected) for rec in chunk)
+        sent.update(rec['id'] for rec in chunk)
+        return True
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def _request(self, method, path, body=None):
+        """
+        在长连接上发一个请求,返回解析后的 JSON;暂时性失败返回 None,被拒绝时抛出 RequestRejected。
+        服务器可能已关闭空闲连接,所以失败后换一条新连接重试一次。
+        """
+        data = None if body is None else json.dumps(body, ensure_ascii=False).encode('utf-8')
+        headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+        for attempt in range(2):
+            if self.conn is None: self.conn = self._connect()
+            try:
+                self.conn.request(method, path, data, headers)
+                resp = self.conn.getresponse()
+                payload = resp.read() # 必须读完,连接才能复用
+                if resp.will_close:
+                    self.conn.close()
+                    self.conn = None
+                if 200 <= resp.status < 300:
+                    self.online = True
+                    return json.loads(payload or b'null')
+                self.online = True
+                if 400 <= resp.status < 500 and resp.status not in (408, 429): raise RequestRejected(resp.status)
+                return None # 服务器暂时不可用 (5xx / 限流):留到下一次 sync
+            except (OSError, http.client.HTTPException, ValueError):
+                self.conn.close()
+                self.conn = None
+        self.online = False
+        return None
+
+
+# ==========================================
+# 本地替身服务器 (开发 / 联调用)
+# ==========================================
+class LeaderboardServer:
+    """
+    最小的排行榜服务器,数据只在内存里。支持 HTTP/1.1 长连接。
+    用法: python leaderboard.py [端口]
+    """
+
+    def __init__(self, host='127.0.0.1', port=8767, base='/api', limit=10):
+        self.base = base.rstrip('/')
+        self.limit = limit
+        self.scores = {}      # id -> 记录
+        self.requests = 0     # 收到的请求数
+        self.connections = 0  # 建立过的 TCP 连接数
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with server.lock: server.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, obj):
+                body = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path != server.base + '/scores': return self._reply(404, {'error': 'not found'})
+                difficulty = parse_qs(url.query).get('difficulty', [''])[0]
+                with server.lock:
+                    server.requests += 1
+                    runs = [r for r in server.scores.values() if r['difficulty'] == difficulty]
+                runs.sort(key=lambda r: r['time'])
+                self._reply(200, [{'name': r['name'], 'time': r['time'], 'metrics': r['metrics']}
+                                  for r in runs[:server.limit]])
+
+            def do_POST(self):
+                if self.path != server.base + '/scores': return self._reply(404, {'error': 'not found'})
+                try:
+                    items = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                    items = [{'id': str(r['id']), 'difficulty': str(r['difficulty']), 'name': str(r['name']),
+                              'time': float(r['time']), 'metrics': dict(r.get('metrics') or {})} for r in items]
+                except (ValueError, KeyError, TypeError):
+                    return self._reply(400, {'error': 'bad request'})
+                with server.lock:
+                    server.requests += 1
+                    for r in items: server.scores[r['id']] = r
+                self._reply(200, {'accepted': len(items)})
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == '__main__':
+    srv = LeaderboardServer('0.0.0.0', int(sys.argv[1]) if len(sys.argv) > 1 else 8767)
+    print(f'排行榜替身服务器: http://0.0.0.0:{srv.port}{srv.base}/scores')
+    srv.httpd.serve_forever()
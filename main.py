@@ -1,15 +1,43 @@
 import ui
 from scene import *
-import sound
+import audio
+import console
+import dialogs
 
 # 导入我们的自定义模块
-from controller import MinesweeperGame
+from controller import MinesweeperGame, SpectatorScene
+from model import DIFFICULTIES
+import engine
 from utils import ScoreManager
+from telemetry import Telemetry
+from leaderboard import LeaderboardClient
+
+# 本地遥测 (菜单开关打开时创建,多局共用同一个实例)
+telemetry = None
+
+# 在线排行榜服务器 (host, port);None 表示只保留本地记录。
+# 本地联调可先运行 python leaderboard.py 启动替身服务器,再填 ('127.0.0.1', 8767)
+LEADERBOARD_SERVER = None
+leaderboard = LeaderboardClient(*LEADERBOARD_SERVER) if LEADERBOARD_SERVER else None
+
+# 直播 / 观战使用的端口 (spectator.SpectatorServer)
+SPECTATOR_PORT = 8765
+# 对战服务器端口 (race.MatchServer)
+RACE_PORT = 8766
+
+# 菜单里的拓扑选项: (种类, 显示名)
+TOPOLOGY_NAMES = [('grid', '方格'), ('torus', '环面'), ('hex', '六边形'), ('cube', '立体')]
+
+def topology_spec(kind, rows):
+    """菜单选项 -> 拓扑字符串;立体棋盘把行平均分成若干层 (每层 3 或 4 行)"""
+    if kind != 'cube': return kind
+    return 'cube:3' if rows % 3 == 0 else 'cube:4'
 
 def show_menu():
     """显示难度选择菜单"""
     v = ui.View(name='扫雷大师')
     v.background_color = '#ecf0f1'
+    if leaderboard: leaderboard.sync() # 补传离线期间积压的成绩
     
     # 标题
     lbl = ui.Label(frame=(0, 40, 400, 60))
@@ -21,28 +49,37 @@ def show_menu():
 
     def start_game(sender):
         """点击难度按钮后的回调"""
-        sound.play_effect('ui:click3')
         diff = sender.difficulty
+        kind, label = TOPOLOGY_NAMES[topo_seg.selected_index]
+        topology = topology_spec(kind, diff['r'])
+        # 非经典拓扑的成绩单独记录
+        name = diff['name'] if kind == 'grid' else f"{diff['name']}·{label}"
+        if not engine.supports(topology):
+            console.hud_alert('当前后端只支持经典方格', 'error')
+            return
+        if live_sw.value and kind != 'grid':
+            console.hud_alert('直播只支持经典方格', 'error')
+            return
+        audio.play('ui:click3')
         v.close() # 关闭菜单视图
+        # 直播:本机开观战服务器,观众在菜单里点“观战”并输入本机 IP 即可加入
+        spectator = None
+        if live_sw.value:
+            from spectator import SpectatorServer
+            spectator = SpectatorServer(port=SPECTATOR_PORT)
         
         # 安全启动游戏,防止 View 冲突
         def safe_launch():
             try:
-                run(MinesweeperGame(diff['name'], diff['r'], diff['c'], diff['m']))
+                run(MinesweeperGame(name, diff['r'], diff['c'], diff['m'], topology=topology, telemetry=telemetry,
+                                     leaderboard=leaderboard, spectator=spectator))
             except Exception as e:
                 # 如果菜单关闭动画未结束,0.5秒后重试
                 ui.delay(safe_launch, 0.5)
         ui.delay(safe_launch, 0.5)
 
-    # 难度配置表
-    configs = [
-        {'name': '初级', 'r': 9, 'c': 9, 'm': 10},
-        {'name': '中级', 'r': 16, 'c': 16, 'm': 40},
-        {'name': '高级', 'r': 16, 'c': 30, 'm': 99}
-    ]
-
     start_y = 130
-    for cfg in configs:
+    for cfg in DIFFICULTIES:
         # 创建难度按钮
         btn = ui.Button(title=cfg['name'])
         btn.frame = (40, start_y, 120, 50)
@@ -55,14 +92,106 @@ def show_menu():
         # 创建最高分标签
         score_lbl = ui.Label(frame=(180, start_y, 200, 50))
         score_lbl.text = ScoreManager.get_best_text(cfg['name'])
+        # 在线榜只读缓存,不等网络;缓存过期时在后台刷新,下次打开菜单生效
+        online = leaderboard.best_text(cfg['name']) if leaderboard else None
+        if online:
+            score_lbl.text += '\n' + online
+            score_lbl.number_of_lines = 2
         score_lbl.text_color = '#7f8c8d'; score_lbl.font = ('<system>', 14)
         v.add_subview(score_lbl)
         
         start_y += 70
 
-    v.frame = (0, 0, 400, 400)
+    # 棋盘后端选择 (对所有后端的行为一致,只影响速度)
+    names = list(engine.BACKENDS)
+    seg = ui.SegmentedControl(frame=(40, start_y, 320, 32))
+    seg.segments = names
+    seg.selected_index = names.index(engine.default_backend)
+    def select_backend(sender):
+        engine.set_backend(names[sender.selected_index])
+    seg.action = select_backend
+    v.add_subview(seg)
+    
+    # 棋盘拓扑选择
+    topo_seg = ui.SegmentedControl(frame=(40, start_y + 44, 320, 32))
+    topo_seg.segments = [label for _, label in TOPOLOGY_NAMES]
+    topo_seg.selected_index = 0
+    v.add_subview(topo_seg)
+    
+    # 本地遥测开关 (默认关闭,数据只写在本地文件)
+    tele_lbl = ui.Label(frame=(40, start_y + 88, 200, 32))
+    tele_lbl.text = '记录本地性能数据'
+    tele_lbl.text_color = '#7f8c8d'; tele_lbl.font = ('<system>', 14)
+    v.add_subview(tele_lbl)
+    tele_sw = ui.Switch(frame=(300, start_y + 88, 60, 32))
+    tele_sw.value = telemetry is not None
+    def toggle_telemetry(sender):
+        global telemetry
+        if sender.value: telemetry = telemetry or Telemetry()
+        elif telemetry:
+            telemetry.stop()
+            telemetry = None
+    tele_sw.action = toggle_telemetry
+    v.add_subview(tele_sw)
+    
+    # 直播开关:打开后开始的对局会在 SPECTATOR_PORT 上推流
+    live_lbl = ui.Label(frame=(40, start_y + 132, 200, 32))
+    live_lbl.text = '直播本局 (供他人观战)'
+    live_lbl.text_color = '#7f8c8d'; live_lbl.font = ('<system>', 14)
+    v.add_subview(live_lbl)
+    live_sw = ui.Switch(frame=(300, start_y + 132, 60, 32))
+    v.add_subview(live_sw)
+    
+    # 观战:连接另一台设备上的直播
+    def watch(sender):
+        host = dialogs.input_alert('观战', '输入直播设备的 IP 地址', '127.0.0.1')
+        if not host: return
+        audio.play('ui:click3')
+        v.close()
+        def safe_launch():
+            try: run(SpectatorScene(host, SPECTATOR_PORT))
+            except Exception: ui.delay(safe_launch, 0.5)
+        ui.delay(safe_launch, 0.5)
+    watch_btn = ui.Button(title='👀 观战')
+    watch_btn.frame = (40, start_y + 180, 150, 44)
+    watch_btn.background_color = '#7f8c8d'; watch_btn.tint_color = 'white'
+    watch_btn.font = ('<system-bold>', 16); watch_btn.corner_radius = 8
+    watch_btn.action = watch
+    v.add_subview(watch_btn)
+    
+    # 对战:连接对战服务器 (桌面端运行 python race.py),人满后所有人用同一个种子开局
+    def join_race(sender):
+        form = dialogs.form_dialog('联网对战', [
+            {'type': 'text', 'key': 'host', 'title': '服务器', 'value': '127.0.0.1'},
+            {'type': 'text', 'key': 'match', 'title': '房间号', 'value': '1'},
+            {'type': 'text', 'key': 'name', 'title': '昵称', 'value': '玩家1'},
+            {'type': 'text', 'key': 'difficulty', 'title': '难度 (房主决定)', 'value': DIFFICULTIES[0]['name']},
+            {'type': 'number', 'key': 'players', 'title': '人数', 'value': '2'},
+        ])
+        if not form or not form['host']: return
+        try: players = int(form['players'])
+        except ValueError: players = 2
+        from race import RaceClient
+        race = RaceClient(form['host'], form['match'], form['name'], form['difficulty'], players, port=RACE_PORT)
+        audio.play('ui:click3')
+        v.close()
+        # 真正的棋盘规格由服务器下发,这里先用任意难度占位
+        cfg = DIFFICULTIES[0]
+        def safe_launch():
+            try: run(MinesweeperGame(cfg['name'], cfg['r'], cfg['c'], cfg['m'], race=race, telemetry=telemetry))
+            except Exception: ui.delay(safe_launch, 0.5)
+        ui.delay(safe_launch, 0.5)
+    race_btn = ui.Button(title='⚔️ 对战')
+    race_btn.frame = (210, start_y + 180, 150, 44)
+    race_btn.background_color = '#e67e22'; race_btn.tint_color = 'white'
+    race_btn.font = ('<system-bold>', 16); race_btn.corner_radius = 8
+    race_btn.action = join_race
+    v.add_subview(race_btn)
+
+    v.frame = (0, 0, 400, 580)
     v.present('sheet')
 
 # 程序入口判断
 if __name__ == '__main__':
+    audio.preload() # 启动时解码全部音效,第一次点击没有加载延迟
     show_menu()
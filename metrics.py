@@ -0,0 +1,87 @@
+from array import array
+
+from topology import grid_table
+
+# ==========================================
+# 棋盘难度指标 (3BV / Openings / Islands)
+# ==========================================
+# 3BV     : 不插旗情况下清盘所需的最少点击数 = 开局区域数 + 不与任何 0 相邻的数字格数
+# Openings: 相连 0 区域的个数
+# Islands : 不与 0 相邻的数字格组成的连通块个数
+# 所有指标在一次线性扫描中完成:扫描到格子 i 时,只与下标更小 (已扫描过) 的邻居做并查集合并;
+# 邻居来自 CSR 邻接表,因此对任何拓扑都适用。
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]] # 路径减半
+        i = parent[i]
+    return i
+
+
+def _union(parent, a, b):
+    """合并两个集合,返回是否真的发生了合并"""
+    ra, rb = _find(parent, a), _find(parent, b)
+    if ra == rb: return False
+    parent[rb] = ra
+    return True
+
+
+def board_metrics(grid, nb=None):
+    """
+    O(格子数) 计算棋盘指标。
+    :param grid: 二维数值网格,-1 为雷,0 以上为数字 (即 MinesweeperModel.grid)
+    :param nb: 棋盘的邻接表 (topology.NeighbourTable),省略时按经典方格处理
+    :return: {'3bv', 'openings', 'islands', 'numbers'}
+    """
+    if nb is None: nb = grid_table(len(grid), len(grid[0]) if len(grid) else 0)
+    size, cols, indptr, indices = nb.size, nb.cols, nb.indptr, nb.indices
+    vals = [grid[i // cols][i % cols] for i in range(size)]
+    parent = array('i', range(size))
+    isolated = bytearray(size)   # 不与 0 相邻的数字格
+    openings = islands = numbers = lone = 0
+
+    for i in range(size):
+        v = vals[i]
+        if v == -1: continue
+        around = indices[indptr[i]:indptr[i + 1]]
+        if v == 0:
+            openings += 1
+            for j in around:
+                if j < i and vals[j] == 0 and _union(parent, i, j): openings -= 1
+            continue
+
+        numbers += 1
+        if any(vals[j] == 0 for j in around): continue
+        isolated[i] = 1
+        lone += 1
+        islands += 1
+        for j in around:
+            if j < i and isolated[j] and _union(parent, i, j): islands -= 1
+
+    return {'3bv': openings + lone, 'openings': openings, 'islands': islands, 'numbers': numbers}
+
+
+def efficiency(model):
+    """
+    实时效率指标 (可在对局中每帧调用,不重新扫描棋盘)。
+    clicks 取操作日志长度 (翻开、标记、Chord 都算一次点击)。
+    :return: {'clicks', '3bv/s', 'ioe'};棋盘尚未生成时返回 None
+    """
+    bbbv = model.get_metrics()
+    if bbbv is None: return None
+    bbbv = bbbv['3bv']
+    clicks = len(model.actions)
+    duration = model.get_duration()
+    return {
+        'clicks': clicks,
+        '3bv/s': bbbv / duration if duration > 0 else 0.0,
+        'ioe': bbbv / clicks if clicks else 0.0,
+    }
+
+
+def score_record(model):
+    """胜利时随成绩一起保存的指标:棋盘指标 + 效率"""
+    record = dict(model.get_metrics() or {})
+    record.update(efficiency(model) or {})
+    return record
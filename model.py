@@ -1,61 +1,343 @@
 import random
 import time
+import zlib
+from array import array
+from itertools import chain
 
-class MinesweeperModel:
-    """扫雷游戏的核心逻辑大脑"""
+from topology import grid_table, table_for, LazyNeighbourTable
+from diskboard import DiskBoard
+from metrics import board_metrics
+from engine import BoardEngine
+
+# 需要对外广播的状态变更类型 (见 MinesweeperModel.add_listener)
+CHANGE_REVEAL = 'reveal'
+CHANGE_MARK = 'mark'
+
+# 难度配置表 (菜单与对战服务器共用)
+DIFFICULTIES = [
+    {'name': '初级', 'r': 9, 'c': 9, 'm': 10},
+    {'name': '中级', 'r': 16, 'c': 16, 'm': 40},
+    {'name': '高级', 'r': 16, 'c': 30, 'm': 99}
+]
+
+# 格子数超过该值时默认使用惰性棋盘 (见 LazyGrid)
+LAZY_CELLS = 1 << 18
+# 格子数超过该值时默认使用磁盘棋盘 (见 diskboard.py)
+DISK_CELLS = 1 << 28
+
+
+def sample_mines(rng, rows, cols, mines, safe):
+    """
+    抽取雷的扁平下标,排除首击格 safe,耗时 O(雷数),不构造候选列表。
+    对 rows*cols-1 个“跳过 safe 的下标”抽样,再把 >= safe 的下标后移一位;
+    random.sample 对 range 在稀疏时走集合拒绝采样,稠密时才复制 range。
+    与早期按坐标列表抽样的 RNG 调用序列一致,旧的 seed 与回放仍然有效。
+    """
+    return [k + 1 if k >= safe else k for k in rng.sample(range(rows * cols - 1), mines)]
+
+
+# Zobrist 哈希:每个 (格子, 可见状态) 对应一个 64 位随机键,局面哈希 = 所有非“未翻开”格子键的异或。
+# 键由 splitmix64 从 (下标, 状态码) 直接算出,不需要 O(格子数) 的随机表,超大棋盘也一样适用。
+# 状态码:已翻开格子为 数值 + 1 (雷为 0),旗帜 / 问号各占一个码
+ZOBRIST_FLAG, ZOBRIST_QUESTION = 30, 31
+_MARK_CODES = {'flag': ZOBRIST_FLAG, 'question': ZOBRIST_QUESTION}
+ZOBRIST_CODES = 32
+_M64 = (1 << 64) - 1
+
+
+def _mix64(x):
+    """splitmix64 的输出函数,把任意整数打散成 64 位伪随机数"""
+    x = (x + 0x9E3779B97F4A7C15) & _M64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _M64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _M64
+    return x ^ (x >> 31)
+
+
+def zobrist_key(i, code):
+    return _mix64(i * ZOBRIST_CODES + code)
+
+
+def zobrist_base(rows, cols, mines, topology='grid'):
+    """空白局面的哈希:只由棋盘规格决定,同规格的局面 (不论 seed) 可以共用分析结果"""
+    return _mix64(zlib.crc32(f'{rows}x{cols}:{mines}:{topology}'.encode()) | 1 << 63)
+
+
+class _LazyRow:
+    __slots__ = ('grid', 'base')
+
+    def __init__(self, grid, base):
+        self.grid = grid
+        self.base = base
+
+    def __len__(self):
+        return self.grid.cols
+
+    def __getitem__(self, c):
+        return self.grid.value(self.base + c)
+
+
+class LazyGrid:
+    """
+    只保存雷的位置 (扁平下标集合) 的网格,兼容 grid[r][c] 读法。
+    数字在第一次读取时数邻居算出并缓存,一局里从没被翻开/查看的格子不花任何代价。
+    """
+
+    def __init__(self, rows, cols, nb):
+        self.rows = rows
+        self.cols = cols
+        self.nb = nb
+        self.mine_set = set()
+        self.cache = {}
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, r):
+        return _LazyRow(self, r * self.cols)
+
+    def value(self, i):
+        v = self.cache.get(i)
+        if v is None:
+            mine_set = self.mine_set
+            if i in mine_set: v = -1
+            else: v = sum(1 for j in self.nb.neighbour_indices(i) if j in mine_set)
+            self.cache[i] = v
+        return v
+
+
+class MinesweeperModel(BoardEngine):
+    """扫雷游戏的核心逻辑大脑 (BoardEngine 的参考实现)"""
     
-    def __init__(self, difficulty_name, rows, cols, mines):
+    def __init__(self, difficulty_name, rows, cols, mines, seed=None, lazy=None, topology='grid', path=None):
         self.diff_name = difficulty_name
         self.rows = rows
         self.cols = cols
         self.mines = mines
         
-        # 初始化网格:0代表空,-1代表雷,1-8代表数字
-        self.grid = [[0 for _ in range(cols)] for _ in range(rows)]
+        # 独立的随机数生成器:相同 seed + 相同首击位置 => 相同雷区 (用于对战与回放)
+        # 未指定时也随机选定一个具体的 seed,保证任何对局都能回放
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+        
+        # 棋盘拓扑 (方格 / 环面 / 六边形 / 立体),决定每个格子的邻居,见 topology.py
+        self.topology = topology
+        
+        # 磁盘棋盘:格子与状态都存在内存映射文件 path 里 (None 且棋盘超大时用临时文件),
+        # 也可以直接传入 DiskBoard.open 打开的存档 (见 resume)
+        self.disk = None
+        if isinstance(path, DiskBoard): self.disk = path
+        elif path is not None or rows * cols > DISK_CELLS:
+            self.disk = DiskBoard.create(path, difficulty_name, rows, cols, mines, self.seed, topology, LazyNeighbourTable)
+        
+        # 惰性棋盘:只存雷的位置,数字按需计算,不建邻接表、不标记开局区域、不计算难度指标
+        # None 表示按棋盘大小自动选择;磁盘棋盘总是惰性的
+        self.lazy = rows * cols > LAZY_CELLS if lazy is None else lazy
+        if self.disk: self.lazy = True
+        
+        if self.disk:
+            self.nb = self.disk.nb
+            self.grid = self.disk
+        elif self.lazy:
+            self.nb = LazyNeighbourTable(rows, cols, topology)
+            self.grid = LazyGrid(rows, cols, self.nb)
+        else:
+            # 同尺寸、同拓扑棋盘共享的邻接表
+            self.nb = grid_table(rows, cols, topology)
+            # 初始化网格:0代表空,-1代表雷,1-8代表数字
+            self.grid = [[0 for _ in range(cols)] for _ in range(rows)]
         
         # 集合(Set)用于快速查找,存储坐标元组 (row, col)
         self.revealed = set()   # 已翻开的格子
         self.flags = set()      # 已插旗的格子
         self.questions = set()  # 标记问号的格子
+        if self.disk: # 磁盘棋盘的状态直接读写文件里的字节
+            self.revealed, self.flags, self.questions = self.disk.revealed, self.disk.flags, self.disk.questions
         
         # 游戏状态
         self.game_over = False
         self.won = False
         self.first_move = True  # 标记是否是第一步
+        self.pregenerated = None # 已在后台为其生成好雷区的首击格子,见 pregenerate
+        self.generation = None   # 后台生成雷区的进度 (阶段名, 0-1),供渲染器显示,见 pregenerate
         self.start_time = None
         self.end_time = None
+        
+        # 开局区域 (相连的 0 及其外圈数字),在生成雷区时一次性标记,见 _label_openings
+        self.region_of = None   # 每个格子所属 0 区域的编号,非 0 格子为 -1
+        self.openings = []      # 每个区域包含的格子扁平下标 (array)
+        self.dirty_regions = set() # 已被逐格泛洪部分翻开的区域,不能再整块翻开
+        self.metrics = None     # 棋盘难度指标 (3BV 等),见 metrics.py
+        
+        # 操作日志: [(相对开局的毫秒数, 操作, r, c)]
+        # 操作为 'r'翻开 / 'f'标记 / 'c'清除标记 / 'h'数字自动翻开 / 'a'全盘清扫 (r = c = -1)
+        self.actions = []
+        
+        # 状态变更监听者 (观战推流等),回调签名: fn(kind, cells)
+        self.listeners = []
+        
+        # 玩家可见局面的 Zobrist 哈希,随每次变更增量更新 (见 _notify / _hash_mark);
+        # 读档的磁盘棋盘直接取文件头里的值,不扫描全盘 (新文件头里为 0)
+        if self.disk and self.disk.zobrist: self.zobrist = self.disk.zobrist
+        else: self.rehash()
+
+    def rehash(self):
+        """
+        从头计算局面哈希 (新对局时调用,也可用来核对增量维护的结果)。
+        先看 len:磁盘棋盘的集合视图迭代要扫描整个文件,空集合直接跳过。
+        """
+        grid, cols = self.grid, self.cols
+        h = zobrist_base(self.rows, self.cols, self.mines, self.topology)
+        if len(self.revealed):
+            for r, c in self.revealed: h ^= zobrist_key(r * cols + c, grid[r][c] + 1)
+        if len(self.flags):
+            for r, c in self.flags: h ^= zobrist_key(r * cols + c, ZOBRIST_FLAG)
+        if len(self.questions):
+            for r, c in self.questions: h ^= zobrist_key(r * cols + c, ZOBRIST_QUESTION)
+        self._set_hash(h)
+        return h
+
+    def _set_hash(self, h):
+        # 磁盘棋盘把哈希同步写进文件头 (和计数一样只改映射上的几个字节),读档时直接取回
+        self.zobrist = h
+        if self.disk: self.disk.set_zobrist(h)
+
+    def _hash_mark(self, r, c, old, new):
+        """标记从 old 变为 new ('flag' / 'question' / 'none') 时更新局面哈希,由改标记的方法调用"""
+        i, h = r * self.cols + c, self.zobrist
+        if old != 'none': h ^= zobrist_key(i, _MARK_CODES[old])
+        if new != 'none': h ^= zobrist_key(i, _MARK_CODES[new])
+        self._set_hash(h)
+
+    def add_listener(self, fn):
+        """
+        注册状态变更回调。
+        kind 为 CHANGE_REVEAL 时 cells 是本次新翻开的格子列表 (点击的格子在前);
+        kind 为 CHANGE_MARK 时 cells 是 [(r, c, state)],state 取 'flag'/'question'/'none'。
+        回调在调用方线程同步执行,必须足够轻量 (不要在里面做 IO)。
+        """
+        self.listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self.listeners: self.listeners.remove(fn)
+
+    def _notify(self, kind, cells):
+        """
+        广播变更集。翻开的格子顺带以 O(变更格子数) 更新局面哈希;
+        标记变化的哈希由改标记的方法自己更新 (只有它们知道旧标记),见 _hash_mark。
+        """
+        if not cells: return
+        if kind == CHANGE_REVEAL:
+            grid, cols, h = self.grid, self.cols, self.zobrist
+            for r, c in cells: h ^= zobrist_key(r * cols + c, grid[r][c] + 1)
+            self._set_hash(h)
+        for fn in self.listeners: fn(kind, cells)
 
     def _generate_board(self, safe_r, safe_c):
         """
         生成雷区。
         关键逻辑:确保玩家点击的第一个格子 (safe_r, safe_c) 绝对不是雷。
         """
-        # 生成所有可能的坐标列表,排除掉玩家点击的那个点
-        candidates = [(r, c) for r in range(self.rows) for c in range(self.cols) if (r, c) != (safe_r, safe_c)]
-        # 随机抽取地雷位置
-        mine_pos = random.sample(candidates, self.mines)
+        # 磁盘棋盘:按行条带流式写入文件,数字等到被读取时再算
+        if self.disk:
+            self.disk.generate(self.rng, safe_r * self.cols + safe_c, lambda f: self._progress('布雷', f))
+            return
+        
+        # 直接抽取雷的扁平下标,排除掉玩家点击的那个点
+        self._progress('布雷', 0)
+        mine_idx = sample_mines(self.rng, self.rows, self.cols, self.mines, safe_r * self.cols + safe_c)
+        
+        # 惰性棋盘:记下雷的位置即可,数字等到被读取时再算
+        if self.lazy:
+            self.grid.mine_set.update(mine_idx)
+            return
         
         # 布雷 (-1)
-        for r, c in mine_pos:
-            self.grid[r][c] = -1
+        cols = self.cols
+        for k in mine_idx:
+            self.grid[k // cols][k % cols] = -1
             
-        # 计算非雷格子周围的雷数
-        for r in range(self.rows):
-            for c in range(self.cols):
-                if self.grid[r][c] == -1: continue # 跳过地雷本身
-                # 计算周围8格中有多少个 -1
-                self.grid[r][c] = self.count_around(r, c, lambda nr, nc: self.grid[nr][nc] == -1)
+        # 计算非雷格子周围的雷数:每个雷给它的邻居 +1,只需 O(雷数 × 8)
+        self._progress('计算数字', 0.25)
+        around = self.nb.around
+        for k in mine_idx:
+            for nr, nc in around[k]:
+                if self.grid[nr][nc] != -1: self.grid[nr][nc] += 1
+        
+        self._progress('标记开局区域', 0.5)
+        self._label_openings()
+        self._progress('计算难度指标', 0.75)
+        self.metrics = board_metrics(self.grid, self.nb)
+
+    def _progress(self, stage, fraction):
+        # 只由生成线程写入,整体替换元组,渲染线程读到的总是一致的一对值
+        self.generation = (stage, fraction)
+
+    def pregenerate(self, safe_r, safe_c):
+        """
+        提前为首击 (safe_r, safe_c) 生成雷区,可在后台线程调用:
+        只写入雷区相关数据,不改变翻开状态、不计时、不广播。
+        完成后由主线程调用 reveal(safe_r, safe_c) 完成真正的首次翻开。
+        """
+        self._generate_board(safe_r, safe_c)
+        self.generation = None
+        self.pregenerated = (safe_r, safe_c) # 最后赋值:主线程看到它时雷区已经完整
+
+    def _label_openings(self):
+        """
+        一次线性扫描标记所有 0 区域。
+        每个 0 只入队一次,外圈数字用 seen 数组按区域去重,总耗时 O(格子数 × 8)。
+        区域内的格子以扁平下标存储:0 按 BFS 顺序在前,外圈数字随后。
+        """
+        size, indptr, indices = self.nb.size, self.nb.indptr, self.nb.indices
+        vals = [v for row in self.grid for v in row]
+        region_of = array('i', [-1]) * size
+        seen = array('i', [-1]) * size
+        openings = []
+        for start in range(size):
+            if vals[start] != 0 or region_of[start] != -1: continue
+            label = len(openings)
+            region_of[start] = label
+            zeros, border = [start], []
+            i = 0
+            while i < len(zeros):
+                z = zeros[i]
+                i += 1
+                for j in indices[indptr[z]:indptr[z + 1]]:
+                    if vals[j] == 0:
+                        if region_of[j] == -1:
+                            region_of[j] = label
+                            zeros.append(j)
+                    elif seen[j] != label:
+                        seen[j] = label
+                        border.append(j)
+            openings.append(array('i', zeros + border))
+        self.region_of = region_of
+        self.openings = openings
+
+    def get_metrics(self):
+        """棋盘难度指标;棋盘尚未生成或是惰性棋盘 (需要扫描全盘) 时返回 None (子类可在首次访问时再计算)"""
+        if self.first_move or self.lazy: return None
+        if self.metrics is None: self.metrics = board_metrics(self.grid, table_for(self))
+        return self.metrics
+
+    def _region_marked(self, label):
+        """是否有旗帜/问号落在该区域内 (0 或外圈数字上);标记通常很少,直接遍历"""
+        region_of, cols = self.region_of, self.cols
+        for r, c in chain(self.flags, self.questions):
+            i = r * cols + c
+            if region_of[i] == label: return True
+            if any(region_of[j] == label for j in self.nb.neighbour_indices(i)): return True
+        return False
+
+    def neighbours(self, r, c):
+        """(r, c) 的邻居坐标元组 (来自共享邻接表,不分配新对象)"""
+        return self.nb.around[r * self.cols + c]
 
     def count_around(self, r, c, condition_func):
-        """通用辅助函数:计算(r,c)周围8个格子中,满足 condition_func 条件的个数"""
+        """通用辅助函数:计算(r,c)的邻居中,满足 condition_func 条件的个数"""
         count = 0
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0: continue # 跳过自己
-                nr, nc = r + dr, c + dc
-                # 检查边界
-                if 0 <= nr < self.rows and 0 <= nc < self.cols:
-                    if condition_func(nr, nc): count += 1
+        for nr, nc in self.nb.around[r * self.cols + c]:
+            if condition_func(nr, nc): count += 1
         return count
 
     def start_timer_if_needed(self):
@@ -63,6 +345,10 @@ class MinesweeperModel:
         if self.start_time is None:
             self.start_time = time.time()
 
+    def _log(self, op, r, c):
+        """记录一次玩家操作 (需在 start_timer_if_needed 之后调用)"""
+        self.actions.append((int((time.time() - self.start_time) * 1000), op, r, c))
+
     def get_duration(self):
         """计算游戏耗时"""
         if self.start_time is None: return 0
@@ -76,37 +362,67 @@ class MinesweeperModel:
         返回新的状态字符串,以便 Controller 播放对应音效
         """
         self.start_timer_if_needed()
+        self._log('f', r, c)
         if (r, c) in self.revealed: return # 已翻开的不能标记
         
         state = 'none'
         if (r, c) in self.flags:
             self.flags.remove((r, c))
             self.questions.add((r, c))
-            state = 'question'
+            old, state = 'flag', 'question'
         elif (r, c) in self.questions:
             self.questions.remove((r, c))
-            state = 'none'
+            old, state = 'question', 'none'
         else:
             self.flags.add((r, c))
-            state = 'flag'
+            old, state = 'none', 'flag'
+        self._hash_mark(r, c, old, state)
+        self._notify(CHANGE_MARK, [(r, c, state)])
         return state
 
+    def clear_mark(self, r, c):
+        """清除格子上的旗帜/问号 (双击强制翻开前调用)"""
+        if (r, c) in self.flags:
+            self.flags.remove((r, c))
+            old = 'flag'
+        elif (r, c) in self.questions:
+            self.questions.remove((r, c))
+            old = 'question'
+        else: return
+        self.start_timer_if_needed()
+        self._log('c', r, c)
+        self._hash_mark(r, c, old, 'none')
+        self._notify(CHANGE_MARK, [(r, c, 'none')])
+
     def reveal(self, r, c):
         """
         翻开格子 (核心逻辑)
-        包含递归泛洪算法 (Flood Fill)
+        点到 0 时整块翻开预先标记好的区域,区域被标记遮挡时退回泛洪算法 (Flood Fill)。
+        :return: 本次新翻开的格子列表 (变更集),无变化时为空列表
         """
         self.start_timer_if_needed()
+        self._log('r', r, c)
         
-        # 如果是第一步,现在才生成雷区,保证第一步不死
+        # 如果是第一步,现在才生成雷区 (已在后台生成过的除外),保证第一步不死
         if self.first_move:
-            self._generate_board(r, c)
+            if self.pregenerated is None: self._generate_board(r, c)
             self.first_move = False
             
+        opened = self._open(r, c)
+        self._check_win()
+        self._notify(CHANGE_REVEAL, opened)
+        return opened
+
+    def _open(self, r, c):
+        """
+        翻开单个格子并泛洪,不做计时、日志、胜负判定与广播 (由调用方统一处理)。
+        :return: 新翻开的格子列表
+        """
         # 保护:已翻开、插旗或问号的格子不能被翻开
-        if (r, c) in self.revealed or (r, c) in self.flags or (r, c) in self.questions: return
+        if (r, c) in self.revealed or (r, c) in self.flags or (r, c) in self.questions: return []
         
         self.revealed.add((r, c))
+        opened = [(r, c)]
         
         # 踩雷判断
         if self.grid[r][c] == -1:
@@ -114,17 +430,120 @@ class MinesweeperModel:
             self.end_time = time.time()
         # 空格判断 (0)
         elif self.grid[r][c] == 0:
-            # 递归翻开周围所有格子
-            for dr in [-1, 0, 1]:
-                for dc in [-1, 0, 1]:
-                    nr, nc = r + dr, c + dc
-                    if 0 <= nr < self.rows and 0 <= nc < self.cols:
-                        self.reveal(nr, nc)
-                        
+            label = self.region_of[r * self.cols + c] if self.region_of is not None else None
+            revealed = self.revealed
+            # 快速路径:区域完好且无标记遮挡时,整块翻开预先标记好的区域 (惰性棋盘没有区域表)
+            if label is not None and label not in self.dirty_regions and not self._region_marked(label):
+                coords = self.nb.coords
+                for i in self.openings[label]:
+                    pos = coords[i]
+                    if pos in revealed: continue
+                    revealed.add(pos)
+                    opened.append(pos)
+                return opened
+            
+            # 慢速路径:被标记挡住的区域只能逐格泛洪 (opened 本身充当 BFS 队列)
+            if label is not None: self.dirty_regions.add(label)
+            grid, around, cols = self.grid, self.nb.around, self.cols
+            flags, questions = self.flags, self.questions
+            i = 0
+            while i < len(opened):
+                cr, cc = opened[i]
+                i += 1
+                if grid[cr][cc] != 0: continue
+                for pos in around[cr * cols + cc]:
+                    if pos in revealed or pos in flags or pos in questions: continue
+                    revealed.add(pos)
+                    opened.append(pos)
+        return opened
+
+    def _chord(self, r, c):
+        """单个数字格的 Chord:周围旗帜数等于数字时,翻开其余未标记的邻居"""
+        if (r, c) not in self.revealed or self.grid[r][c] <= 0: return []
+        around = self.neighbours(r, c)
+        if sum(1 for pos in around if pos in self.flags) != self.grid[r][c]: return []
+        opened = []
+        for nr, nc in around:
+            opened.extend(self._open(nr, nc))
+        return opened
+
+    def chord(self, r, c):
+        """
+        数字自动翻开 (Chord),作为一次批量操作:
+        所有邻居翻开完毕后只做一次胜负判定、一次广播。
+        :return: 合并后的变更集;条件不满足时为空列表
+        """
+        self.start_timer_if_needed()
+        self._log('h', r, c)
+        opened = self._chord(r, c)
+        self._check_win()
+        self._notify(CHANGE_REVEAL, opened)
+        return opened
+
+    def clear_satisfied(self):
+        """
+        全盘自动清扫:反复对“旗帜数已满足”的数字格做 Chord,直到不再有变化 (不动点)。
+        用工作表 (worklist) 驱动,只有新翻开的数字格才会被再次检查。
+        :return: 合并后的变更集
+        """
+        self.start_timer_if_needed()
+        self._log('a', -1, -1)
+        frontier = [(r, c) for r, c in self.revealed if self.grid[r][c] > 0]
+        opened = []
+        # 按“波次”推进:旗帜在清扫过程中不变,所以只有新翻开的数字格需要进入下一波
+        while frontier and not self.game_over:
+            new = []
+            for r, c in frontier: new.extend(self._chord(r, c))
+            opened.extend(new)
+            frontier = [(nr, nc) for nr, nc in new if self.grid[nr][nc] > 0]
         self._check_win()
+        self._notify(CHANGE_REVEAL, opened)
+        return opened
 
     def _check_win(self):
         """检查胜利条件:所有非雷格子都已翻开"""
         if not self.game_over and len(self.revealed) == (self.rows * self.cols - self.mines):
             self.won = True
             self.end_time = time.time()
+        if self.disk and (self.won or self.game_over): self.save()
+
+    def save(self):
+        """
+        磁盘棋盘存档:格子与标记早已写在映射上,这里只补写胜负与用时并刷盘。
+        操作日志不存档,读档后的对局不能从头回放。
+        """
+        if not self.disk: raise ValueError('只有磁盘棋盘支持存档')
+        self.disk.sync(2 if self.won else 1 if self.game_over else 0, self.get_duration())
+
+    def close(self):
+        """丢弃对局时调用:关闭磁盘棋盘 (临时文件随之删除,存档文件保留);内存棋盘什么也不做"""
+        if self.disk: self.disk.close()
+
+    @classmethod
+    def resume(cls, path):
+        """读档:重新映射磁盘棋盘文件,计时从存档时的用时继续"""
+        disk = DiskBoard.open(path, LazyNeighbourTable)
+        model = cls(disk.diff_name, disk.rows, disk.cols, disk.mines, seed=disk.seed, topology=disk.topology, path=disk)
+        model.first_move = not disk.generated
+        model.game_over, model.won = disk.status == 1, disk.status == 2
+        if disk.elapsed or disk.generated:
+            model.start_time = time.time() - disk.elapsed
+            if disk.status: model.end_time = model.start_time + disk.elapsed
+        return model
+
+
+def replay(difficulty_name, rows, cols, mines, seed, actions, topology='grid'):
+    """
+    无界面回放:用相同的 seed 重建棋盘并依次执行操作日志。
+    :return: 回放结束后的 MinesweeperModel (可检查 won / game_over / revealed 等)
+    """
+    model = MinesweeperModel(difficulty_name, rows, cols, mines, seed=seed, topology=topology)
+    ops = {'r': model.reveal, 'f': model.toggle_flag, 'c': model.clear_mark, 'h': model.chord}
+    for _, op, r, c in actions:
+        if model.game_over or model.won: break
+        if op == 'a':
+            model.clear_satisfied()
+            continue
+        if not (0 <= r < rows and 0 <= c < cols): raise ValueError(f'坐标越界: {(r, c)}')
+        ops[op](r, c)
+    return model
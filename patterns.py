@@ -0,0 +1,258 @@
+import os
+import random
+import struct
+import sys
+from collections import OrderedDict
+
+from worker import snapshot, basic_hints
+
+# ==========================================
+# 局部模式表:5×5 窗口 + 二面体规范化 + 磁盘查表
+# ==========================================
+# 以一个未翻开的格子为中心取 5×5 窗口,每格编码为 0-8 (数字) / 隐藏 / 旗帜 / 墙 (棋盘外)。
+# 中心 3×3 内的数字,其邻居全部落在窗口里,这些数字就是窗口内完整的约束;
+# 只凭这些约束判断中心格在所有可能的布雷方案中是否恒为安全或恒为雷。
+# 1-1、1-2、1-2-1、靠墙、角落等常见定式都在这个范围内。
+# 窗口在 8 种旋转/翻转下结论不变 (中心格是不动点),取 8 种排列中字典序最小者作为规范键,
+# 先查预先生成的表 (随程序发布,可用 python patterns.py 重新生成),
+# 查不到才做一次窗口内的精确求解 (结果放进容量有限的 LRU 缓存)。
+# 推出的雷当作旗帜再查一轮,并与单点推理 (worker.basic_hints) 合并,反复直到没有新结论,
+# 因此结论总是单点推理的超集。
+# 窗口只对经典方格有意义,其他拓扑只用单点推理。
+
+SIZE = 5
+HIDDEN, FLAG, WALL = 9, 10, 11
+UNKNOWN, SAFE, MINE = 0, 1, 2
+
+# 模式表与本模块放在一起,不依赖当前工作目录
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'minesweeper_patterns.bin')
+CACHE_SIZE = 1 << 16 # 现场求解结果的缓存上限 (条)
+_MAGIC = b'MSPT\x01'
+
+
+def _permutations():
+    """5×5 窗口在二面体群 D4 下的 8 种下标排列"""
+    n = SIZE - 1
+    maps = [lambda r, c: (r, c), lambda r, c: (c, n - r), lambda r, c: (n - r, n - c), lambda r, c: (n - c, r),
+            lambda r, c: (r, n - c), lambda r, c: (n - r, c), lambda r, c: (c, r), lambda r, c: (n - c, n - r)]
+    perms = []
+    for f in maps:
+        perm = [0] * (SIZE * SIZE)
+        for r in range(SIZE):
+            for c in range(SIZE):
+                nr, nc = f(r, c)
+                perm[nr * SIZE + nc] = r * SIZE + c
+        perms.append(perm)
+    return perms
+
+PERMS = _permutations()
+
+
+def canonical(raw):
+    """窗口编码 (25 字节) -> 8 种对称中最小的那个"""
+    return min(bytes(raw[i] for i in perm) for perm in PERMS)
+
+
+def window(snap, r, c):
+    """从快照 (worker.BoardSnapshot) 取以 (r, c) 为中心的窗口编码"""
+    numbers, flags, rows, cols = snap.numbers, snap.flags, snap.rows, snap.cols
+    out = bytearray(SIZE * SIZE)
+    i = 0
+    for nr in range(r - 2, r + 3):
+        for nc in range(c - 2, c + 3):
+            if not (0 <= nr < rows and 0 <= nc < cols): out[i] = WALL
+            elif (nr, nc) in numbers: out[i] = numbers[(nr, nc)]
+            elif (nr, nc) in flags: out[i] = FLAG
+            else: out[i] = HIDDEN
+            i += 1
+    return bytes(out)
+
+
+def solve_window(raw):
+    """
+    窗口内精确求解:枚举中心 3×3 数字约束下的全部布雷方案 (带剪枝的回溯)。
+    旗帜按雷处理;约束自相矛盾 (错旗) 时返回 UNKNOWN。
+    :return: SAFE / MINE / UNKNOWN
+    """
+    center = 2 * SIZE + 2
+    constraints = []
+    for r in range(1, 4):
+        for c in range(1, 4):
+            v = raw[r * SIZE + c]
+            if v > 8: continue # 隐藏 / 旗帜 / 墙不是约束
+            cells = [nr * SIZE + nc for nr in (r - 1, r, r + 1) for nc in (c - 1, c, c + 1) if (nr, nc) != (r, c)]
+            need = v - sum(1 for j in cells if raw[j] == FLAG)
+            free = [j for j in cells if raw[j] == HIDDEN]
+            if not 0 <= need <= len(free): return UNKNOWN
+            constraints.append((need, free))
+    if not any(center in free for _, free in constraints): return UNKNOWN
+
+    # 变量按首次出现的顺序排列,让约束尽早被完全赋值
+    order = []
+    for _, free in constraints:
+        for j in free:
+            if j not in order: order.append(j)
+    slot = {j: k for k, j in enumerate(order)}
+    cons = [(need, [slot[j] for j in free]) for need, free in constraints]
+    watch = [[] for _ in order] # 变量 -> 涉及它的约束
+    for k, (_, vs) in enumerate(cons):
+        for v in vs: watch[v].append(k)
+    mines = [0] * len(cons)     # 每个约束已赋值为雷的个数
+    left = [len(vs) for _, vs in cons] # 每个约束尚未赋值的变量数
+    assign = [0] * len(order)
+    seen = [False, False]       # 中心格为安全 / 为雷的方案是否出现过
+    target = slot[center]
+
+    def dfs(k):
+        if k == len(order):
+            seen[assign[target]] = True
+            return seen[0] and seen[1]
+        for value in (0, 1):
+            ok = True
+            for ci in watch[k]:
+                mines[ci] += value
+                left[ci] -= 1
+                need = cons[ci][0]
+                if mines[ci] > need or mines[ci] + left[ci] < need: ok = False
+            assign[k] = value
+            if ok and dfs(k + 1): return True
+            for ci in watch[k]:
+                mines[ci] -= value
+                left[ci] += 1
+        return False
+
+    dfs(0)
+    if seen[0] and not seen[1]: return SAFE
+    if seen[1] and not seen[0]: return MINE
+    return UNKNOWN
+
+
+class PatternTable:
+    """
+    规范化窗口 -> 结论。表里也存没有结论 (UNKNOWN) 的窗口:
+    实战中大多数边界窗口推不出结论,不存的话每次都要现场求解。
+    """
+
+    def __init__(self, path=TABLE_PATH, cache_size=CACHE_SIZE):
+        self.path = path
+        self.table = {}
+        # 本次运行中查表未命中、现场求解的结果 (含 UNKNOWN),LRU 淘汰;cache_size 为 None 表示不设上限 (离线生成表时)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.hits = self.misses = 0
+        if path and os.path.exists(path): self.load(path)
+
+    def load(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(_MAGIC): raise ValueError(f'不是模式表文件: {path}')
+        (count,) = struct.unpack_from('!I', data, len(_MAGIC))
+        pos = len(_MAGIC) + 4
+        rec = SIZE * SIZE + 1
+        for k in range(count):
+            chunk = data[pos + k * rec:pos + (k + 1) * rec]
+            self.table[chunk[:-1]] = chunk[-1]
+
+    def save(self, path=None):
+        """把表与本次求解过的窗口一起写盘 (按键排序,内容与插入顺序无关)"""
+        merged = dict(self.table)
+        merged.update(self.cache)
+        with open(path or self.path, 'wb') as f:
+            f.write(_MAGIC + struct.pack('!I', len(merged)))
+            for key in sorted(merged): f.write(key + bytes((merged[key],)))
+
+    def lookup(self, raw):
+        """O(1) 查一个窗口;未命中时现场求解并缓存"""
+        key = canonical(raw)
+        v = self.table.get(key)
+        if v is not None:
+            self.hits += 1
+            return v
+        v = self.cache.get(key)
+        if v is not None:
+            self.cache.move_to_end(key)
+            return v
+        self.misses += 1
+        v = self.cache[key] = solve_window(raw)
+        if self.cache_size is not None and len(self.cache) > self.cache_size: self.cache.popitem(last=False)
+        return v
+
+    def deductions(self, snap, cancelled=lambda: False):
+        """
+        查表与单点推理交替进行:每一轮把已推出的雷当作旗帜,直到不再有新结论。
+        :return: {'safe': 集合, 'mines': 集合};被取消时返回 None
+        """
+        safe, mines = set(), set()
+        while True:
+            cur = snap._replace(flags=snap.flags | mines)
+            found = self.single_pass(cur, cancelled)
+            basic = basic_hints(cur, cancelled)
+            if found is None or basic is None: return None
+            new_mines = (found['mines'] | basic['mines']) - mines
+            new_safe = (found['safe'] | basic['safe']) - safe
+            safe |= new_safe
+            mines |= new_mines
+            # 只有新的雷会改变下一轮的输入;安全格无法翻开,不影响窗口编码
+            if not new_mines: return {'safe': safe, 'mines': mines}
+
+    def single_pass(self, snap, cancelled=lambda: False):
+        """
+        对所有与数字相邻的隐藏格查一次表 (旗帜视为雷)。
+        :return: {'safe': 集合, 'mines': 集合};被取消时返回 None
+        """
+        rows, cols, numbers, revealed, flags = snap.rows, snap.cols, snap.numbers, snap.revealed, snap.flags
+        frontier = set()
+        for (r, c), v in numbers.items():
+            if v <= 0: continue
+            for nr in (r - 1, r, r + 1):
+                for nc in (c - 1, c, c + 1):
+                    if 0 <= nr < rows and 0 <= nc < cols and (nr, nc) not in revealed and (nr, nc) not in flags:
+                        frontier.add((nr, nc))
+        safe, mines = set(), set()
+        for k, (r, c) in enumerate(frontier):
+            if k % 256 == 0 and cancelled(): return None
+            v = self.lookup(window(snap, r, c))
+            if v == SAFE: safe.add((r, c))
+            elif v == MINE: mines.add((r, c))
+        return {'safe': safe, 'mines': mines}
+
+
+_shared = None
+
+def pattern_hints(snap, cancelled):
+    """AnalysisWorker 任务:用共享的模式表给出提示 (表在第一次使用时于后台线程加载)"""
+    global _shared
+    if snap.topology != 'grid': return basic_hints(snap, cancelled)
+    if _shared is None: _shared = PatternTable()
+    return _shared.deductions(snap, cancelled)
+
+
+def build(games=500, seed=0, path=TABLE_PATH):
+    """
+    离线生成模式表:用同一个引擎自动玩若干局 (只翻开推出的安全格,卡住时随机翻开),
+    把途中遇到的全部窗口求解后写盘。
+    """
+    from model import MinesweeperModel, DIFFICULTIES
+    rng = random.Random(seed)
+    table = PatternTable(None, cache_size=None)
+    for g in range(games):
+        cfg = DIFFICULTIES[g % len(DIFFICULTIES)]
+        model = MinesweeperModel(cfg['name'], cfg['r'], cfg['c'], cfg['m'], seed=rng.getrandbits(64))
+        model.reveal(rng.randrange(model.rows), rng.randrange(model.cols))
+        while not (model.game_over or model.won):
+            found = table.deductions(snapshot(model))
+            for r, c in found['mines']:
+                if (r, c) not in model.flags: model.toggle_flag(r, c)
+            if found['safe']:
+                for r, c in found['safe']: model.reveal(r, c)
+                continue
+            hidden = [(r, c) for r in range(model.rows) for c in range(model.cols)
+                      if (r, c) not in model.revealed and (r, c) not in model.flags]
+            model.reveal(*rng.choice(hidden))
+    table.save(path)
+    return len(table.table) + len(table.cache)
+
+
+if __name__ == '__main__':
+    # 用法: python patterns.py [局数]   生成 minesweeper_patterns.bin
+    print(build(int(sys.argv[1]) if len(sys.argv) > 1 else 500), '个模式')
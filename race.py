@@ -0,0 +1,245 @@
+import asyncio
+import json
+import random
+import threading
+import time
+
+from model import DIFFICULTIES, replay
+
+# ==========================================
+# 对战协议:每行一个 JSON 对象
+# ==========================================
+# 客户端 -> 服务器
+#   {"op": "join", "match": "房间号", "name": "玩家", "difficulty": "中级", "players": 2}
+#   {"op": "progress", "revealed": 已翻开格子数}
+#   {"op": "finish", "actions": [[毫秒, 操作, r, c], ...]}
+# 服务器 -> 客户端
+#   {"op": "start", "seed": 种子, "config": 难度配置, "start": [r, c], "players": [...]}
+#   {"op": "progress", "name": 玩家, "revealed": n}
+#   {"op": "result", "name": 玩家, "valid": 是否通过回放校验, "time": 官方用时(秒,服务器计时)}
+#   {"op": "over", "ranking": [[玩家, 用时], ...]}
+#   {"op": "error", "msg": 说明}
+
+
+def _encode(msg):
+    return (json.dumps(msg, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def validate_finish(config, seed, actions):
+    """
+    回放操作日志,校验是否真的赢下了这一局。
+    回放只能证明胜负,证明不了用时:时间戳由客户端填写,可以整体改小。
+    :return: 日志自身记录的用时(秒),只用于与服务器观测的用时做一致性检查;
+             日志无效或未获胜时返回 None
+    """
+    try:
+        actions = [(int(t), str(op), int(r), int(c)) for t, op, r, c in actions]
+        model = replay(config['name'], config['r'], config['c'], config['m'], seed, actions)
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not model.won: return None
+    # 时间戳必须单调不减,否则说明日志被篡改
+    stamps = [a[0] for a in actions]
+    if stamps != sorted(stamps): return None
+    return stamps[-1] / 1000
+
+
+class Match:
+    """一局对战:同一个种子、同一个起始格"""
+
+    def __init__(self, match_id, config, capacity):
+        self.id = match_id
+        self.config = config
+        self.capacity = capacity
+        self.seed = random.getrandbits(32)
+        self.start = (random.randrange(config['r']), random.randrange(config['c']))
+        self.players = {}    # name -> StreamWriter
+        self.results = {}    # name -> 用时(秒) 或 None
+        self.started_at = None
+
+    @property
+    def full(self):
+        return len(self.players) >= self.capacity
+
+    def broadcast(self, msg):
+        data = _encode(msg)
+        for w in self.players.values():
+            if not w.is_closing(): w.write(data)
+
+
+class MatchServer:
+    """
+    对战服务器。
+    每个连接一个协程,房间之间互不影响;回放校验放进线程池执行,不会卡住事件循环。
+    """
+    # 日志用时与服务器观测用时允许的最大偏差 (秒),覆盖开局广播与 finish 上行的网络延迟
+    MAX_CLOCK_SKEW = 5.0
+
+    def __init__(self, host='0.0.0.0', port=8766):
+        self.host = host
+        self.port = port
+        self.matches = {}
+        self.configs = {cfg['name']: cfg for cfg in DIFFICULTIES}
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._on_client, self.host, self.port)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None: await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server: self._server.close()
+
+    def _join(self, msg, writer):
+        match = self.matches.get(msg.get('match'))
+        if match is None:
+            config = self.configs.get(msg.get('difficulty'), DIFFICULTIES[0])
+            capacity = max(2, int(msg.get('players', 2)))
+            match = self.matches[msg.get('match')] = Match(msg.get('match'), config, capacity)
+        name = str(msg.get('name', '玩家'))
+        if match.started_at is not None or name in match.players:
+            writer.write(_encode({'op': 'error', 'msg': '房间已开始或昵称重复'}))
+            return None, None
+        match.players[name] = writer
+        if match.full:
+            match.started_at = time.time()
+            match.broadcast({'op': 'start', 'seed': match.seed, 'config': match.config,
+                             'start': list(match.start), 'players': list(match.players)})
+        return match, name
+
+    async def _finish(self, match, name, actions):
+        # 官方用时 = 服务器从开局广播到收到 finish 的时长 (收到时立即记下,不含回放校验的耗时)
+        observed = time.time() - match.started_at
+        loop = asyncio.get_running_loop()
+        logged = await loop.run_in_executor(None, validate_finish, match.config, match.seed, actions)
+        elapsed = observed
+        # 日志用时与观测用时相差过大 (超过网络延迟能解释的范围) 说明时间戳被改过
+        if logged is None or abs(observed - logged) > self.MAX_CLOCK_SKEW: elapsed = None
+        match.results[name] = elapsed
+        match.broadcast({'op': 'result', 'name': name, 'valid': elapsed is not None, 'time': elapsed})
+        self._maybe_close(match)
+
+    def _maybe_close(self, match):
+        if len(match.results) < len(match.players): return
+        valid = sorted((t, n) for n, t in match.results.items() if t is not None)
+        match.broadcast({'op': 'over', 'ranking': [[n, t] for t, n in valid]})
+        self.matches.pop(match.id, None)
+
+    async def _on_client(self, reader, writer):
+        match, name = None, None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    continue
+                op = msg.get('op')
+                if op == 'join' and match is None:
+                    match, name = self._join(msg, writer)
+                elif match is None or match.started_at is None or name in match.results:
+                    continue
+                elif op == 'progress':
+                    match.broadcast({'op': 'progress', 'name': name, 'revealed': int(msg.get('revealed', 0))})
+                elif op == 'finish':
+                    await self._finish(match, name, msg.get('actions', []))
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            if match is not None and name is not None:
+                if match.started_at is None:
+                    match.players.pop(name, None)
+                    if not match.players: self.matches.pop(match.id, None)
+                elif name not in match.results:
+                    # 中途掉线记为未完成
+                    match.results[name] = None
+                    self._maybe_close(match)
+            writer.close()
+
+
+class RaceClient:
+    """
+    对战客户端。
+    在后台线程跑事件循环,Scene 每帧读取 seed / progress / ranking 即可,不会阻塞界面。
+    """
+
+    def __init__(self, host, match_id, name, difficulty='初级', players=2, port=8766):
+        self.host = host
+        self.port = port
+        self.join_msg = {'op': 'join', 'match': match_id, 'name': name,
+                         'difficulty': difficulty, 'players': players}
+        self.name = name
+        self.seed = None
+        self.config = None
+        self.start_cell = None
+        self.players = []
+        self.progress = {}   # 玩家 -> 已翻开格子数
+        self.results = {}    # 玩家 -> 用时(秒) 或 None
+        self.ranking = None
+        self.error = None
+        self._loop = None
+        self._writer = None
+        self._thread = None
+
+    def _handle(self, msg):
+        op = msg.get('op')
+        if op == 'start':
+            self.config = msg['config']
+            self.start_cell = tuple(msg['start'])
+            self.players = msg['players']
+            self.seed = msg['seed'] # 最后赋值:Scene 以 seed 是否就绪判断开局
+        elif op == 'progress':
+            self.progress[msg['name']] = msg['revealed']
+        elif op == 'result':
+            self.results[msg['name']] = msg['time']
+        elif op == 'over':
+            self.ranking = msg['ranking']
+        elif op == 'error':
+            self.error = msg['msg']
+
+    async def run(self):
+        """连接失败、连接中断或收到无法解析的数据时把原因写进 self.error,由 Scene 显示"""
+        self._loop = asyncio.get_running_loop()
+        try:
+            reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        except OSError as e:
+            self.error = f'无法连接对战服务器: {e}'
+            return
+        self._writer.write(_encode(self.join_msg))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                self._handle(json.loads(line))
+            if self.ranking is None and self.error is None: self.error = '与对战服务器的连接已断开'
+        except (OSError, ValueError, KeyError, asyncio.IncompleteReadError) as e:
+            self.error = f'对战连接出错: {e}'
+        finally:
+            self._writer.close()
+
+    def start(self):
+        if self._thread is not None: return
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.run()), daemon=True)
+        self._thread.start()
+
+    def _send(self, msg):
+        # 可在任意线程调用,实际写入交给事件循环线程
+        if self._loop is None or self._writer is None: return
+        self._loop.call_soon_threadsafe(self._writer.write, _encode(msg))
+
+    def send_progress(self, revealed):
+        self._send({'op': 'progress', 'revealed': revealed})
+
+    def send_finish(self, actions):
+        self._send({'op': 'finish', 'actions': [list(a) for a in actions]})
+
+
+if __name__ == '__main__':
+    # 独立运行即启动对战服务器
+    asyncio.run(MatchServer().serve_forever())
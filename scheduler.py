@@ -0,0 +1,40 @@
+# ==========================================
+# 空闲感知的重绘调度
+# ==========================================
+# Scene 默认每秒重绘 60 次。棋盘与 HUD 都没有变化时,这些重绘纯属浪费电量。
+# 调度器记录每帧的“可见状态键” (计时器秒数、剩余雷数、胜负等),
+# 连续若干帧没有变化、也没有输入与动画时,通知控制器暂停 Scene;
+# 之后由输入、Model 变更或下一次计时器跳秒唤醒。
+
+
+class RedrawScheduler:
+    IDLE_FRAMES = 10 # 连续多少帧无变化后进入空闲 (约 1/6 秒)
+
+    def __init__(self):
+        self.dirty = True
+        self.last_key = None
+        self.idle_frames = 0
+
+    def invalidate(self):
+        """有输入或状态变化:下一帧必须重绘,并重新开始空闲计数"""
+        self.dirty = True
+
+    def frame_done(self, key, can_idle):
+        """
+        每帧绘制结束时调用。
+        :param key: 本帧可见状态的摘要,变化即视为有新内容
+        :param can_idle: 当前是否允许暂停 (例如没有进行中的动画或按住的手指)
+        :return: True 表示可以暂停 Scene
+        """
+        if self.dirty or key != self.last_key:
+            self.dirty = False
+            self.last_key = key
+            self.idle_frames = 0
+            return False
+        self.idle_frames += 1
+        return can_idle and self.idle_frames >= self.IDLE_FRAMES
+
+    @staticmethod
+    def next_tick_delay(duration):
+        """距离计时器下一次跳秒还有多久 (秒),稍微多等一点确保跳秒已经发生"""
+        return 1 - (duration % 1) + 0.02
@@ -0,0 +1,337 @@
+import asyncio
+import collections
+import struct
+import threading
+import time
+
+from model import CHANGE_REVEAL
+
+# ==========================================
+# 观战推流:二进制协议
+# ==========================================
+# 每条消息 = 头部 '!BI' (消息类型, 负载长度) + 负载
+#
+# KEYFRAME 负载: '!IHHHIB' (棋盘代号, rows, cols, mines, 耗时毫秒, 游戏状态) + rows*cols 字节的格子状态
+# DELTA    负载: '!IIBH'   (棋盘代号, 耗时毫秒, 游戏状态, 操作数) + 若干操作
+# 棋盘代号在服务端每次换局 (attach) 时加一;观众只应用与最近一次关键帧代号相同的增量,
+# 换局前后交错到达的旧增量 (或新局先于关键帧到达的增量) 直接丢弃。
+#   OP_REVEAL_RUN: '!BHHH' (op, 行, 起始列, 长度) + 长度个字节的格子值 (同一行连续翻开的格子合并为一段)
+#   OP_MARK:       '!BHHB' (op, 行, 列, 格子状态)
+MSG_KEYFRAME = 1
+MSG_DELTA = 2
+
+OP_REVEAL_RUN = 1
+OP_MARK = 2
+
+# 格子状态字节:0-8 为已翻开的数字
+CELL_MINE = 9
+CELL_HIDDEN = 10
+CELL_FLAG = 11
+CELL_QUESTION = 12
+
+STATUS_PLAYING, STATUS_LOST, STATUS_WON = 0, 1, 2
+
+HEADER = struct.Struct('!BI')
+KEYFRAME_HEAD = struct.Struct('!IHHHIB')
+DELTA_HEAD = struct.Struct('!IIBH')
+RUN_HEAD = struct.Struct('!BHHH')
+MARK = struct.Struct('!BHHB')
+
+MARK_CODES = {'flag': CELL_FLAG, 'question': CELL_QUESTION, 'none': CELL_HIDDEN}
+
+
+def _status_of(board):
+    if board.game_over: return STATUS_LOST
+    if board.won: return STATUS_WON
+    return STATUS_PLAYING
+
+
+def _value_byte(v):
+    return CELL_MINE if v == -1 else v
+
+
+def _pack(msg_type, payload):
+    return HEADER.pack(msg_type, len(payload)) + payload
+
+
+def encode_keyframe(model, generation=0):
+    """把当前整盘状态编码为关键帧 (新观众加入或换局时发送)"""
+    cells = bytearray([CELL_HIDDEN]) * (model.rows * model.cols)
+    for r, c in model.revealed:
+        cells[r * model.cols + c] = _value_byte(model.grid[r][c])
+    for r, c in model.flags:
+        cells[r * model.cols + c] = CELL_FLAG
+    for r, c in model.questions:
+        cells[r * model.cols + c] = CELL_QUESTION
+    head = KEYFRAME_HEAD.pack(generation, model.rows, model.cols, model.mines,
+                              int(model.get_duration() * 1000), _status_of(model))
+    return _pack(MSG_KEYFRAME, head + bytes(cells))
+
+
+def encode_delta(model, events, generation=0):
+    """
+    把一帧内累积的变更事件编码为增量消息。
+    翻开的格子按 (行, 列) 排序后,同一行里连续的格子压缩成一段。
+    """
+    ops = []
+    revealed = sorted({pos for kind, cells in events if kind == CHANGE_REVEAL for pos in cells})
+    i = 0
+    while i < len(revealed):
+        r, c0 = revealed[i]
+        j = i + 1
+        while j < len(revealed) and revealed[j] == (r, c0 + j - i) and j - i < 0xFFFF: j += 1
+        values = bytes(_value_byte(model.grid[r][c]) for r, c in revealed[i:j])
+        ops.append(RUN_HEAD.pack(OP_REVEAL_RUN, r, c0, j - i) + values)
+        i = j
+    for kind, cells in events:
+        if kind == CHANGE_REVEAL: continue
+        for r, c, state in cells:
+            ops.append(MARK.pack(OP_MARK, r, c, MARK_CODES[state]))
+    head = DELTA_HEAD.pack(generation, int(model.get_duration() * 1000), _status_of(model), len(ops))
+    return _pack(MSG_DELTA, head + b''.join(ops))
+
+
+# ==========================================
+# 服务端:挂在 Model 上,后台线程跑 asyncio
+# ==========================================
+class SpectatorServer:
+    """
+    观战服务器。
+    主线程只做两件事:Model 监听回调里把事件塞进队列;每帧调用一次 tick() 打包。
+    所有网络 IO 都在后台线程的事件循环里完成,永远不会阻塞 touch_began。
+    """
+    # 观众发送缓冲超过该值视为掉线,直接断开,避免慢观众拖垮内存
+    MAX_BUFFER = 1 << 20
+
+    def __init__(self, host='0.0.0.0', port=8765):
+        self.host = host
+        self.port = port
+        self.model = None
+        self.generation = 0 # 棋盘代号,每次 attach 加一,写进每一条消息
+        self.events = collections.deque()
+        self.last_second = -1
+
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._viewers = set()   # 已收到关键帧的观众 (仅在事件循环线程里修改)
+        self._pending = set()   # 刚连上、等待关键帧的观众
+
+    # ---- 主线程接口 ----
+    def attach(self, model):
+        """
+        绑定(或切换到)一局新的 Model,所有观众会在下一帧收到新的关键帧。
+        协议只描述经典方格 (数字 0-8),其他拓扑抛出 ValueError。
+        """
+        if getattr(model, 'topology', 'grid') != 'grid': raise ValueError(f'观战不支持拓扑 {model.topology}')
+        if self.model is not None: self.model.remove_listener(self._on_change)
+        self.model = model
+        self.generation = (self.generation + 1) & 0xFFFFFFFF
+        self.events.clear()
+        model.add_listener(self._on_change)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._resync)
+
+    def start(self):
+        """启动后台事件循环线程 (重复调用无副作用)"""
+        if self._thread is not None: return
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+
+    def stop(self):
+        if self._loop is None: return
+        self._loop.call_soon_threadsafe(self._shutdown)
+        self._thread.join(5)
+        self._thread = None
+        self._loop = None
+
+    def tick(self):
+        """
+        每帧调用一次:把本帧积累的事件合并成一条增量,交给事件循环发送。
+        没有变化且计时器秒数未变时什么也不做。
+        """
+        if self._loop is None or self.model is None: return
+        events = []
+        while self.events: events.append(self.events.popleft())
+        second = int(self.model.get_duration())
+        keyframe = encode_keyframe(self.model, self.generation) if self._pending else None
+        if not events and second == self.last_second and keyframe is None: return
+        self.last_second = second
+        delta = encode_delta(self.model, events, self.generation)
+        self._loop.call_soon_threadsafe(self._dispatch, delta, keyframe)
+
+    def _on_change(self, kind, cells):
+        # 运行在玩家线程上,只做一次 O(1) 的入队
+        self.events.append((kind, cells))
+
+    # ---- 事件循环线程 ----
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._on_client, self.host, self.port))
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+        # 收尾:取消仍在等待观众断开的协程
+        tasks = asyncio.all_tasks(self._loop)
+        for t in tasks: t.cancel()
+        self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self._loop.close()
+
+    def _shutdown(self):
+        self._server.close()
+        for w in self._viewers | self._pending: w.close()
+        self._loop.stop()
+
+    def _resync(self):
+        # 换局后所有人重新等待关键帧
+        self._pending |= self._viewers
+        self._viewers.clear()
+
+    async def _on_client(self, reader, writer):
+        self._pending.add(writer)
+        try:
+            # 观众不需要上行数据,读到 EOF 即视为离开
+            while await reader.read(1024): pass
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._pending.discard(writer)
+            self._viewers.discard(writer)
+            writer.close()
+
+    def _send(self, writer, data):
+        if writer.is_closing() or writer.transport.get_write_buffer_size() > self.MAX_BUFFER:
+            writer.close()
+            self._viewers.discard(writer)
+            self._pending.discard(writer)
+            return
+        writer.write(data)
+
+    def _dispatch(self, delta, keyframe):
+        for w in list(self._viewers): self._send(w, delta)
+        # keyframe 为 None 时说明主线程打包时还没看到这些新观众,留到下一帧
+        if keyframe is None: return
+        for w in list(self._pending):
+            self._pending.discard(w)
+            self._viewers.add(w)
+            self._send(w, keyframe)
+
+
+# ==========================================
+# 客户端:重建棋盘
+# ==========================================
+class SpectatorBoard:
+    """
+    观众端的镜像棋盘。
+    字段与 MinesweeperModel 保持一致,因此可以直接交给 GameRenderer 绘制。
+    """
+
+    def __init__(self):
+        self.rows = self.cols = self.mines = 0
+        self.grid = []
+        self.revealed = set()
+        self.flags = set()
+        self.questions = set()
+        self.game_over = False
+        self.won = False
+        self.duration = 0.0
+        self.received_at = None
+        self.generation = None # 最近一次关键帧的棋盘代号;收到关键帧之前丢弃所有增量
+
+    def get_duration(self):
+        """在两次增量之间用本地时钟补齐,保证计时器走动平滑"""
+        if self.received_at is None or self.game_over or self.won: return self.duration
+        return self.duration + time.time() - self.received_at
+
+    def _set_status(self, ms, status):
+        self.duration = ms / 1000
+        self.received_at = time.time()
+        self.game_over = status == STATUS_LOST
+        self.won = status == STATUS_WON
+
+    def _set_cell(self, r, c, code):
+        if not (0 <= r < self.rows and 0 <= c < self.cols): raise ValueError(f'格子越界: ({r}, {c})')
+        if code > CELL_QUESTION: raise ValueError(f'未知格子状态: {code}')
+        pos = (r, c)
+        self.flags.discard(pos)
+        self.questions.discard(pos)
+        if code == CELL_FLAG: self.flags.add(pos)
+        elif code == CELL_QUESTION: self.questions.add(pos)
+        elif code != CELL_HIDDEN:
+            self.revealed.add(pos)
+            self.grid[r][c] = -1 if code == CELL_MINE else code
+
+    def apply(self, msg_type, payload):
+        """应用一条服务器消息;数据不合法时抛出 ValueError (或 struct.error)"""
+        if msg_type == MSG_KEYFRAME:
+            generation, rows, cols, mines, ms, status = KEYFRAME_HEAD.unpack_from(payload)
+            if len(payload) - KEYFRAME_HEAD.size != rows * cols: raise ValueError('关键帧长度与棋盘尺寸不符')
+            self.generation = generation
+            self.rows, self.cols, self.mines = rows, cols, mines
+            self.grid = [[0] * cols for _ in range(rows)]
+            self.revealed, self.flags, self.questions = set(), set(), set()
+            cells = payload[KEYFRAME_HEAD.size:]
+            for i, code in enumerate(cells):
+                if code != CELL_HIDDEN: self._set_cell(i // cols, i % cols, code)
+            self._set_status(ms, status)
+        elif msg_type == MSG_DELTA:
+            generation, ms, status, n_ops = DELTA_HEAD.unpack_from(payload)
+            if generation != self.generation: return # 属于上一局 (或尚未收到的关键帧) 的增量
+            off = DELTA_HEAD.size
+            for _ in range(n_ops):
+                op = payload[off]
+                if op == OP_REVEAL_RUN:
+                    _, r, c0, n = RUN_HEAD.unpack_from(payload, off)
+                    off += RUN_HEAD.size
+                    for k in range(n): self._set_cell(r, c0 + k, payload[off + k])
+                    off += n
+                elif op == OP_MARK:
+                    _, r, c, code = MARK.unpack_from(payload, off)
+                    off += MARK.size
+                    self._set_cell(r, c, code)
+                else:
+                    raise ValueError(f'未知操作码: {op}')
+            self._set_status(ms, status)
+
+
+class SpectatorClient:
+    """观众客户端:连接服务器并持续更新 self.board"""
+
+    def __init__(self, host, port=8765):
+        self.host = host
+        self.port = port
+        self.board = SpectatorBoard()
+        self.connected = False
+        self.error = None
+        self._thread = None
+
+    async def run(self):
+        """连接失败、连接中断或收到不合法的数据时把原因写进 self.error,由 Scene 显示"""
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        except OSError as e:
+            self.error = f'无法连接观战服务器: {e}'
+            return
+        self.connected = True
+        try:
+            while True:
+                msg_type, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+                self.board.apply(msg_type, await reader.readexactly(length))
+        except asyncio.IncompleteReadError:
+            self.error = '直播已结束'
+        except (OSError, ValueError, IndexError, struct.error) as e:
+            self.error = f'观战连接出错: {e}'
+        finally:
+            self.connected = False
+            writer.close()
+
+    def start(self):
+        """在后台线程里运行,供 Pythonista 的 Scene 在 draw 中直接读取 board"""
+        if self._thread is not None: return
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.run()), daemon=True)
+        self._thread.start()
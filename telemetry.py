@@ -0,0 +1,170 @@
+import collections
+import json
+import os
+import threading
+import time
+
+# ==========================================
+# 本地遥测:对局记录 + 帧/输入耗时采样 (需手动开启)
+# ==========================================
+# 主线程只做计数与把记录放进缓冲队列 (O(1),不碰磁盘);
+# 后台线程每隔 flush_interval 秒把缓冲写进 JSONL 文件 (超过 max_bytes 时轮转),
+# 同时把汇总指标写成 Prometheus 文本格式,可直接交给 node_exporter 的 textfile 采集器。
+# 数据只写在本地,不会上传。
+
+FRAME_BUCKETS = (1, 2, 4, 8, 16, 33, 66) # 帧耗时直方图的桶上界 (毫秒)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # 最后一个桶是 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, v):
+        i = 0
+        while i < len(self.buckets) and v > self.buckets[i]: i += 1
+        self.counts[i] += 1
+        self.sum += v
+        self.count += 1
+
+    def exposition(self, name):
+        lines, total = [], 0
+        for le, n in zip(self.buckets + ('+Inf',), self.counts):
+            total += n
+            lines.append(f'{name}_bucket{{le="{le}"}} {total}')
+        lines.append(f'{name}_sum {self.sum:.3f}')
+        lines.append(f'{name}_count {self.count}')
+        return lines
+
+
+class Telemetry:
+    """
+    :param path: JSONL 文件路径,轮转后的旧文件为 path.1 ... path.<backups>
+    :param prom_path: Prometheus 文本文件路径,None 表示不写
+    :param max_bytes: 单个 JSONL 文件的大小上限
+    :param sample_every: 每多少帧采样一条帧耗时记录 (直方图仍统计每一帧)
+    :param flush_interval: 后台写盘间隔 (秒)
+    """
+
+    def __init__(self, path='minesweeper_telemetry.jsonl', prom_path='minesweeper_metrics.prom',
+                 max_bytes=1 << 20, backups=3, sample_every=60, flush_interval=5.0):
+        self.path = path
+        self.prom_path = prom_path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.sample_every = sample_every
+        self.flush_interval = flush_interval
+
+        self.buffer = collections.deque() # 待写入的 JSON 行
+        self.lock = threading.Lock()      # 保护下面的汇总指标
+        self.frames = 0
+        self.frame_ms = _Histogram(FRAME_BUCKETS)
+        self.input_ms = _Histogram(FRAME_BUCKETS)
+        self.games = collections.Counter()        # (难度, 结果) -> 局数
+        self.game_seconds = collections.Counter() # 难度 -> 总用时
+
+        self._wake = threading.Event()
+        self._stopped = False
+        self.thread = None
+
+    # ---- 主线程调用 ----
+    def frame(self, draw_seconds, input_seconds=None):
+        """每帧调用:draw_seconds 为绘制耗时,input_seconds 为本帧处理输入的耗时 (没有输入时为 None)"""
+        draw_ms = draw_seconds * 1000
+        input_ms = None if input_seconds is None else input_seconds * 1000
+        with self.lock:
+            self.frames += 1
+            self.frame_ms.observe(draw_ms)
+            if input_ms is not None: self.input_ms.observe(input_ms)
+        if self.frames % self.sample_every == 0:
+            self._emit({'type': 'frame', 'draw_ms': round(draw_ms, 3),
+                        'input_ms': None if input_ms is None else round(input_ms, 3)})
+
+    def game(self, model):
+        """对局结束时调用一次"""
+        result = 'won' if model.won else 'lost' if model.game_over else 'abandoned'
+        duration = model.get_duration()
+        ops = collections.Counter(a[1] for a in model.actions)
+        with self.lock:
+            self.games[(model.diff_name, result)] += 1
+            self.game_seconds[model.diff_name] += duration
+        self._emit({
+            'type': 'game', 'difficulty': model.diff_name,
+            'topology': getattr(model, 'topology', 'grid'),
+            'rows': model.rows, 'cols': model.cols, 'mines': model.mines,
+            'result': result, 'duration': round(duration, 3),
+            'actions': len(model.actions), 'ops': dict(ops),
+            'metrics': model.get_metrics() or {},
+        })
+
+    def _emit(self, rec):
+        rec['ts'] = round(time.time(), 3)
+        self.buffer.append(json.dumps(rec, ensure_ascii=False))
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """停止后台线程并写完剩余缓冲"""
+        self._stopped = True
+        self._wake.set()
+        if self.thread is not None: self.thread.join()
+        self.thread = None
+        self._stopped = False # 之后再有记录时会重新启动线程
+        self.flush()
+
+    # ---- 导出 ----
+    def prometheus_text(self):
+        """当前汇总指标的 Prometheus 文本格式"""
+        with self.lock:
+            lines = ['# HELP minesweeper_frames_total Frames drawn.',
+                     '# TYPE minesweeper_frames_total counter',
+                     f'minesweeper_frames_total {self.frames}',
+                     '# HELP minesweeper_frame_ms Frame draw time in milliseconds.',
+                     '# TYPE minesweeper_frame_ms histogram']
+            lines += self.frame_ms.exposition('minesweeper_frame_ms')
+            lines += ['# HELP minesweeper_input_ms Input processing time in milliseconds.',
+                      '# TYPE minesweeper_input_ms histogram']
+            lines += self.input_ms.exposition('minesweeper_input_ms')
+            lines += ['# HELP minesweeper_games_total Finished games.',
+                      '# TYPE minesweeper_games_total counter']
+            for (diff, result), n in sorted(self.games.items()):
+                lines.append(f'minesweeper_games_total{{difficulty="{diff}",result="{result}"}} {n}')
+            lines += ['# HELP minesweeper_game_seconds_total Time spent in games.',
+                      '# TYPE minesweeper_game_seconds_total counter']
+            for diff, s in sorted(self.game_seconds.items()):
+                lines.append(f'minesweeper_game_seconds_total{{difficulty="{diff}"}} {s:.3f}')
+        return '\n'.join(lines) + '\n'
+
+    # ---- 后台写盘 ----
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        lines = []
+        while self.buffer: lines.append(self.buffer.popleft())
+        if lines:
+            self._rotate_if_needed()
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        if self.prom_path:
+            # 先写临时文件再改名,采集器不会读到写了一半的文件
+            tmp = self.prom_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp, self.prom_path)
+
+    def _rotate_if_needed(self):
+        try:
+            if os.path.getsize(self.path) < self.max_bytes: return
+        except OSError:
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f'{self.path}.{i}'
+            if os.path.exists(src): os.replace(src, f'{self.path}.{i + 1}')
+        os.replace(self.path, f'{self.path}.1')
@@ -0,0 +1,41 @@
+import os
+
+from model import MinesweeperModel
+
+
+def test_marks_before_generation_survive(tmp_path):
+    """首击前插下的旗帜 / 问号在布雷后仍然存在,计数、迭代与哈希保持一致"""
+    model = MinesweeperModel('disk', 20, 20, 50, seed=1, path=str(tmp_path / 'b.board'))
+    for i in range(1, 400): model.toggle_flag(*divmod(i, 20))
+    model.toggle_flag(19, 19) # 旗帜 -> 问号
+    model.reveal(0, 0)
+    assert len(model.flags) == sum(1 for _ in model.flags) == 398
+    assert len(model.questions) == sum(1 for _ in model.questions) == 1
+    assert sum(1 for r in range(20) for c in range(20) if model.grid[r][c] == -1) == 50
+    assert model.zobrist == model.rehash()
+    model.close()
+
+
+def test_resume_restores_state_and_hash(tmp_path):
+    path = str(tmp_path / 'b.board')
+    model = MinesweeperModel('disk', 30, 30, 100, seed=2, path=path)
+    model.reveal(15, 15)
+    model.toggle_flag(0, 0)
+    h, revealed = model.zobrist, set(model.revealed)
+    model.save()
+    model.close()
+    resumed = MinesweeperModel.resume(path)
+    assert resumed.zobrist == h == resumed.rehash()
+    assert set(resumed.revealed) == revealed and (0, 0) in resumed.flags
+    resumed.close()
+    assert os.path.exists(path) # 存档文件不会被删除
+
+
+def test_temporary_board_is_deleted_on_close(monkeypatch):
+    monkeypatch.setattr('model.DISK_CELLS', 100)
+    model = MinesweeperModel('disk', 20, 20, 50, seed=3)
+    path = model.disk.path
+    assert model.disk.temporary and os.path.exists(path)
+    model.close()
+    assert not os.path.exists(path)
+    model.close() # 重复关闭无副作用
@@ -0,0 +1,160 @@
+from array import array
+from functools import lru_cache
+
+# ==========================================
+# 邻接表:一次计算,全局共享
+# ==========================================
+# 格子的扁平下标 i = r * cols + c。
+# 采用 CSR (压缩稀疏行) 格式:格子 i 的邻居下标为 indices[indptr[i]:indptr[i + 1]]。
+# 边界处理与拓扑差异只在建表时做一次,热循环里不再需要 dr/dc 循环和越界判断,
+# 因此任何拓扑每一步的开销都和经典方格相同。
+#
+# 拓扑用字符串描述 (可写入存档与回放):
+#   'grid'    经典方格,8 邻域
+#   'torus'   上下、左右首尾相接的方格 (环面),8 邻域
+#   'hex'     六边形格子,奇数行向右错开半格 (odd-r 偏移坐标),6 邻域
+#   'cube:H'  三维立方体:每 H 行为一层,各层自上而下堆叠显示,26 邻域
+
+TOPOLOGIES = ('grid', 'torus', 'hex', 'cube')
+
+_SQUARE = tuple((dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc)
+_HEX_EVEN = ((-1, -1), (-1, 0), (0, -1), (0, 1), (1, -1), (1, 0))
+_HEX_ODD = ((-1, 0), (-1, 1), (0, -1), (0, 1), (1, 0), (1, 1))
+
+
+def parse(topology):
+    """
+    解析拓扑字符串。
+    :return: (种类, 层高);非立体拓扑的层高为 None
+    """
+    kind, _, arg = topology.partition(':')
+    if kind not in TOPOLOGIES: raise ValueError(f'未知的拓扑: {topology}')
+    if kind != 'cube': return kind, None
+    if not arg.isdigit() or int(arg) < 1: raise ValueError(f'立体拓扑需要层高,例如 cube:3,而不是 {topology}')
+    return kind, int(arg)
+
+
+def neighbour_fn(topology, rows, cols):
+    """返回 f(r, c) -> 邻居坐标列表;建表与惰性查询共用,保证两者完全一致"""
+    kind, layer = parse(topology)
+
+    if kind == 'grid':
+        def f(r, c):
+            return [(r + dr, c + dc) for dr, dc in _SQUARE
+                    if 0 <= r + dr < rows and 0 <= c + dc < cols]
+    elif kind == 'torus':
+        def f(r, c):
+            out = []
+            for dr, dc in _SQUARE:
+                pos = ((r + dr) % rows, (c + dc) % cols)
+                # 行列数小于 3 时会绕回自身或重复,去掉
+                if pos != (r, c) and pos not in out: out.append(pos)
+            return out
+    elif kind == 'hex':
+        def f(r, c):
+            return [(r + dr, c + dc) for dr, dc in (_HEX_ODD if r & 1 else _HEX_EVEN)
+                    if 0 <= r + dr < rows and 0 <= c + dc < cols]
+    else:
+        if rows % layer: raise ValueError(f'行数 {rows} 不是层高 {layer} 的整数倍')
+        depth = rows // layer
+        def f(r, c):
+            z, y = divmod(r, layer)
+            return [((z + dz) * layer + y + dy, c + dc)
+                    for dz in (-1, 0, 1) if 0 <= z + dz < depth
+                    for dy in (-1, 0, 1) if 0 <= y + dy < layer
+                    for dc in (-1, 0, 1) if 0 <= c + dc < cols and (dz or dy or dc)]
+    return f
+
+
+class NeighbourTable:
+    """某个 (rows, cols, topology) 棋盘的邻接表"""
+
+    def __init__(self, rows, cols, topology='grid'):
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.topology = topology
+        self.kind, self.layer = parse(topology)
+        # 每个格子对应的坐标元组,全局只创建一次,供集合查找直接复用
+        self.coords = [(r, c) for r in range(rows) for c in range(cols)]
+
+        around_of = neighbour_fn(topology, rows, cols)
+        indptr = array('i', [0])
+        indices = array('i')
+        for r in range(rows):
+            for c in range(cols):
+                indices.extend(nr * cols + nc for nr, nc in around_of(r, c))
+                indptr.append(len(indices))
+        self.indptr = indptr
+        self.indices = indices
+
+        # 每个格子的邻居坐标元组 (元素就是 self.coords 中的同一批对象)
+        coords = self.coords
+        self.around = [tuple(coords[j] for j in indices[indptr[i]:indptr[i + 1]])
+                       for i in range(self.size)]
+
+    def index(self, r, c):
+        return r * self.cols + c
+
+    def neighbours(self, r, c):
+        """(r, c) 的邻居坐标元组,不分配新对象"""
+        return self.around[r * self.cols + c]
+
+    def neighbour_indices(self, i):
+        """格子 i 的邻居扁平下标"""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+
+@lru_cache(maxsize=8)
+def grid_table(rows, cols, topology='grid'):
+    """按 (rows, cols, topology) 缓存邻接表:同尺寸的所有对局、渲染器与求解器共用一份"""
+    return NeighbourTable(rows, cols, topology)
+
+
+class _LazySeq:
+    """只支持下标访问的“虚拟列表”,元素在访问时才计算"""
+    __slots__ = ('size', 'get')
+
+    def __init__(self, size, get):
+        self.size = size
+        self.get = get
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        return self.get(i)
+
+
+class LazyNeighbourTable:
+    """
+    不预先建表的邻接查询,coords / around / neighbour_indices 的用法与 NeighbourTable 相同
+    (没有 indptr / indices)。用于超大棋盘:建表本身是 O(格子数),而一局里大部分格子根本不会被访问。
+    """
+
+    def __init__(self, rows, cols, topology='grid'):
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.topology = topology
+        self.kind, self.layer = parse(topology)
+        self._around_of = neighbour_fn(topology, rows, cols)
+        self.coords = _LazySeq(self.size, lambda i: divmod(i, cols))
+        self.around = _LazySeq(self.size, self._around)
+
+    def _around(self, i):
+        return tuple(self._around_of(*divmod(i, self.cols)))
+
+    def index(self, r, c):
+        return r * self.cols + c
+
+    def neighbours(self, r, c):
+        return tuple(self._around_of(r, c))
+
+    def neighbour_indices(self, i):
+        return [r * self.cols + c for r, c in self._around_of(*divmod(i, self.cols))]
+
+
+def table_for(model):
+    """取模型自己的邻接表;没有的 (位棋盘、观战镜像) 退回共享的 grid_table"""
+    return getattr(model, 'nb', None) or grid_table(model.rows, model.cols, getattr(model, 'topology', 'grid'))
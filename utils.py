@@ -46,6 +46,7 @@ class HapticFeedback:
 class ScoreManager:
     """负责读取和保存游戏记录到本地 JSON 文件"""
     FILE_PATH = 'minesweeper_records.json'
+    MAX_RUNS = 20 # 每个难度保留的历史成绩条数
     
     @classmethod
     def load_scores(cls):
@@ -59,10 +60,11 @@ class ScoreManager:
             return {} # 如果文件损坏,返回空字典
 
     @classmethod
-    def save_score(cls, difficulty, name, duration):
+    def save_score(cls, difficulty, name, duration, metrics=None):
         """
         尝试保存新分数。
-        只有当用时 (duration) 比当前最高纪录更短时,才会保存。
+        最快纪录只有当用时 (duration) 比当前最高纪录更短时才会更新;
+        每次胜利还会连同棋盘指标 (metrics.score_record) 写入 runs 列表,供按 3BV/s 排名。
         :return: True 表示打破了纪录,False 表示未打破。
         """
         scores = cls.load_scores()
@@ -70,13 +72,27 @@ class ScoreManager:
         # 获取当前最快时间,默认为 999999 秒
         current_best = current_data.get('time', 999999)
         
-        if duration < current_best:
+        run = {'name': name, 'time': duration, 'metrics': metrics or {}}
+        runs = current_data.get('runs', []) + [run]
+        # 只保留 3BV/s 最高的若干条
+        runs.sort(key=lambda x: x['metrics'].get('3bv/s', 0), reverse=True)
+        runs = runs[:cls.MAX_RUNS]
+        
+        is_best = duration < current_best
+        if is_best:
             # 更新记录
-            scores[difficulty] = {'name': name, 'time': duration}
-            with open(cls.FILE_PATH, 'w') as f:
-                json.dump(scores, f)
-            return True
-        return False
+            current_data = dict(run)
+        current_data['runs'] = runs
+        scores[difficulty] = current_data
+        with open(cls.FILE_PATH, 'w') as f:
+            json.dump(scores, f)
+        return is_best
+
+    @classmethod
+    def get_ranking(cls, difficulty, key='3bv/s'):
+        """按指定指标 (默认 3BV/s) 从高到低返回该难度的历史成绩"""
+        runs = cls.load_scores().get(difficulty, {}).get('runs', [])
+        return sorted(runs, key=lambda x: x['metrics'].get(key, 0), reverse=True)
 
     @classmethod
     def get_best_text(cls, difficulty):
@@ -85,3 +101,26 @@ class ScoreManager:
         if data:
             return f"🏆 {data['name']}: {int(data['time'])}s"
         return "🏆 暂无纪录"
+
+
+# ==========================================
+# 数据存储:对局回放档案
+# ==========================================
+class ReplayArchive:
+    """
+    每局结束后把种子与操作日志追加到 JSONL 档案 (一行一局)。
+    可用 analytics.py 离线批量分析。
+    """
+    FILE_PATH = 'minesweeper_replays.jsonl'
+
+    @classmethod
+    def append(cls, model, player):
+        """追加一局回放;棋盘还未生成 (一步没走) 的对局不保存"""
+        if model.first_move: return
+        rec = {
+            'player': player, 'difficulty': model.diff_name,
+            'rows': model.rows, 'cols': model.cols, 'mines': model.mines,
+            'seed': model.seed, 'topology': getattr(model, 'topology', 'grid'), 'actions': model.actions,
+        }
+        with open(cls.FILE_PATH, 'a') as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + '\n')
@@ -0,0 +1,195 @@
+import numpy as np
+
+# ==========================================
+# 批量扫雷环境:K 个棋盘一起走一步 (机器人 / 强化学习训练用)
+# ==========================================
+# 逐个驱动 MinesweeperModel 时,时间几乎都花在 Python 的逐格循环上。
+# 这里把 K 个同规格棋盘的状态叠成 (K, rows, cols) 的 NumPy 数组:
+#   布雷 = 每盘一行随机键取最小的 mines 个 (首击格的键设为无穷大,保证首击安全);
+#   数字 = 雷平面 8 个方向平移相加;
+#   泛洪 = 对“新翻开的 0”整批做膨胀,所有棋盘同时推进,直到没有棋盘还在扩张。
+# 结束的棋盘在 step 末尾自动重置,下一次翻开时重新布雷。
+# 只支持经典方格;雷区与同 seed 的 MinesweeperModel 不同 (随机数来源不同)。
+#
+# 用法:
+#   env = VecMinesweeper(1024, 16, 30, 99, seed=0)
+#   obs = env.reset()
+#   obs, reward, done, won = env.step(cells)   # cells: (K,) 扁平下标 r * cols + c
+
+# 观察值:0-8 为已翻开格子的数字,HIDDEN 为未翻开,FLAGGED 为插旗
+HIDDEN, FLAGGED = -1, -2
+
+# 奖励:踩雷 / 胜利 / 每翻开一格 (按安全格总数归一,整局合计为 1) / 无效操作
+REWARD_LOSS = -1.0
+REWARD_WIN = 1.0
+REWARD_INVALID = 0.0
+
+
+def _dilate(x):
+    """x 本身加上其 8 邻域,x 为 (n, rows, cols) 的布尔数组 (可分离实现:先纵向再横向)"""
+    v = x.copy()
+    v[:, 1:] |= x[:, :-1]
+    v[:, :-1] |= x[:, 1:]
+    h = v.copy()
+    h[:, :, 1:] |= v[:, :, :-1]
+    h[:, :, :-1] |= v[:, :, 1:]
+    return h
+
+
+def _neighbour_counts(mine):
+    """每个格子周围的雷数,mine 为 (n, rows, cols) 的布尔数组"""
+    rows, cols = mine.shape[1:]
+    p = np.pad(mine, ((0, 0), (1, 1), (1, 1))).astype(np.int8)
+    counts = np.zeros(mine.shape, np.int8)
+    for dr in range(3):
+        for dc in range(3):
+            if dr != 1 or dc != 1: counts += p[:, dr:dr + rows, dc:dc + cols]
+    return counts
+
+
+class VecMinesweeper:
+    """
+    K 个同规格棋盘组成的批量环境。
+    状态全部是 (K, rows, cols) 的数组:mine / counts / revealed / flags;
+    obs 是同形状的 int8 数组,step 原地更新它,返回的就是它本身 (不复制),
+    需要保留某一步的观察值时请自行 copy。
+    """
+
+    def __init__(self, k, rows, cols, mines, seed=None, topology='grid'):
+        if topology != 'grid': raise ValueError(f'批量环境不支持拓扑 {topology}')
+        if not 0 < mines < rows * cols: raise ValueError('雷数必须在 1 与格子数 - 1 之间')
+        self.k = k
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.rng = np.random.default_rng(seed)
+
+        shape = (k, rows, cols)
+        self.mine = np.zeros(shape, bool)
+        self.counts = np.zeros(shape, np.int8)
+        self.revealed = np.zeros(shape, bool)
+        self.flags = np.zeros(shape, bool)
+        self.obs = np.full(shape, HIDDEN, np.int8)
+
+        self.generated = np.zeros(k, bool)   # 该盘是否已布雷 (首次翻开时才布)
+        self.opened = np.zeros(k, np.int64)  # 已翻开的安全格数
+        self.episodes = 0                    # 累计结束的对局数
+        self.wins = 0
+
+    # ---- 重置 ----
+    def reset(self, boards=None):
+        """
+        重置全部 (或 boards 指定的) 棋盘,返回 obs。
+        :param boards: 棋盘下标数组或布尔掩码,None 表示全部
+        """
+        if boards is None: boards = slice(None)
+        self.mine[boards] = False
+        self.counts[boards] = 0
+        self.revealed[boards] = False
+        self.flags[boards] = False
+        self.obs[boards] = HIDDEN
+        self.generated[boards] = False
+        self.opened[boards] = 0
+        return self.obs
+
+    def _generate(self, boards, safe):
+        """为 boards 上的棋盘布雷,safe 为对应的首击扁平下标"""
+        n, size = len(boards), self.rows * self.cols
+        keys = self.rng.random((n, size))
+        keys[np.arange(n), safe] = np.inf
+        idx = np.argpartition(keys, self.mines - 1, axis=1)[:, :self.mines]
+        mine = np.zeros((n, size), bool)
+        np.put_along_axis(mine, idx, True, axis=1)
+        mine = mine.reshape(n, self.rows, self.cols)
+        self.mine[boards] = mine
+        self.counts[boards] = _neighbour_counts(mine)
+        self.generated[boards] = True
+
+    # ---- 单步 ----
+    def step(self, cells, flag=None):
+        """
+        每个棋盘执行一次操作并自动重置结束的棋盘。
+        :param cells: (K,) 扁平下标 r * cols + c
+        :param flag: 可选的 (K,) 布尔掩码,为 True 的棋盘切换该格旗帜而不是翻开
+        :return: (obs, reward, done, won);done / won 描述本步刚结束的对局,
+                 这些棋盘在返回前已经重置,obs 中是新对局的初始局面
+        """
+        cells = np.asarray(cells, np.int64)
+        k, rows, cols = self.k, self.rows, self.cols
+        boards = np.arange(k)
+        r, c = cells // cols, cells % cols
+        reward = np.full(k, REWARD_INVALID)
+        done = np.zeros(k, bool)
+        won = np.zeros(k, bool)
+
+        hidden = ~self.revealed[boards, r, c]
+        if flag is not None:
+            flag = np.asarray(flag, bool)
+            f = boards[flag & hidden]
+            self.flags[f, r[f], c[f]] ^= True
+            self.obs[f, r[f], c[f]] = np.where(self.flags[f, r[f], c[f]], FLAGGED, HIDDEN)
+            hidden &= ~flag
+
+        # 翻开:已翻开或插旗的格子视为无效操作
+        act = boards[hidden & ~self.flags[boards, r, c]]
+        if not len(act): return self.obs, reward, done, won
+        new = act[~self.generated[act]]
+        if len(new): self._generate(new, cells[new])
+
+        ar, ac = r[act], c[act]
+        hit = self.mine[act, ar, ac]
+        lost = act[hit]
+        done[lost] = True
+        reward[lost] = REWARD_LOSS
+        # 踩雷的棋盘马上重置,不必再泛洪
+        safe = act[~hit]
+        opened = self._flood(safe, r[safe], c[safe])
+
+        safe_cells = rows * cols - self.mines
+        self.opened[safe] += opened
+        reward[safe] = opened / safe_cells
+        finished = safe[self.opened[safe] == safe_cells]
+        done[finished] = True
+        won[finished] = True
+        reward[finished] += REWARD_WIN
+
+        if done.any():
+            self.episodes += int(done.sum())
+            self.wins += len(finished)
+            self.reset(done)
+        return self.obs, reward, done, won
+
+    def _flood(self, boards, r, c):
+        """
+        翻开 boards 上的 (r, c) 并从其中的 0 泛洪,所有棋盘同时按层膨胀。
+        :return: 每个棋盘本次新翻开的格子数
+        """
+        opened = np.ones(len(boards), np.int64)
+        if not len(boards): return opened
+        self.revealed[boards, r, c] = True
+        self.obs[boards, r, c] = self.counts[boards, r, c]
+
+        # 只对仍在扩张的棋盘继续膨胀;frontier 是这些棋盘上一层新翻开的格子
+        live = np.flatnonzero(self.counts[boards, r, c] == 0)
+        frontier = np.zeros((len(live), self.rows, self.cols), bool)
+        frontier[np.arange(len(live)), r[live], c[live]] = True
+        while len(live):
+            ids = boards[live]
+            zero = frontier & (self.counts[ids] == 0)
+            grow = _dilate(zero) & ~self.revealed[ids] & ~self.flags[ids]
+            n = grow.sum(axis=(1, 2))
+            opened[live] += n
+            self.revealed[ids] |= grow
+            self.obs[ids] = np.where(grow, self.counts[ids], self.obs[ids])
+            keep = n > 0
+            live, frontier = live[keep], grow[keep]
+        return opened
+
+    # ---- 观察值 ----
+    def observation(self, i):
+        """第 i 个棋盘的观察值 (obs 的视图,不复制)"""
+        return self.obs[i]
+
+    def valid_mask(self):
+        """(K, rows, cols) 布尔数组:可以翻开的格子 (未翻开且未插旗)"""
+        return ~(self.revealed | self.flags)
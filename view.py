@@ -1,8 +1,213 @@
 from scene import *
+import time
+from array import array
+from collections import deque
+from PIL import Image
+from model import CHANGE_REVEAL, CHANGE_MARK
+from topology import table_for, parse
+
+
+def _hex_to_rgb(color):
+    """'#rrggbb' -> (r, g, b),用于位图模式直接写像素"""
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+
+class BoardPixels:
+    """
+    棋盘的像素缓冲:一个格子 (或 block × block 的一块) 对应一个 RGB 像素。
+    建立时只遍历已翻开/已标记的格子;之后完全由 Model 的变更集增量修补,
+    不再做 rows × cols 的整盘扫描。位图 LOD 与小地图共用,
+    两者都按最长边上限选择 block,像素数与棋盘规模无关 (磁盘棋盘也只有一张小图)。
+    """
+    MARK_NONE, MARK_FLAG, MARK_QUESTION = 0, 1, 2
+
+    def __init__(self, model, colors, block=1, source=None):
+        self.m = model
+        # 变更事件来源:默认直接监听 Model,也可以是 RevealAnimator (翻开动画按帧放出格子)
+        self.source = source or model
+        self.colors = colors
+        self.block = block
+        self.w = -(-model.cols // block)
+        self.h = -(-model.rows // block)
+        self.rgb = {k: bytes(_hex_to_rgb(v)) for k, v in colors.items() if k != 'nums'}
+        self.nums = [bytes(_hex_to_rgb(v)) for v in colors['nums']]
+        self._texture = None
+        self.dirty = True
+        # 没有监听接口的棋盘 (如观众端镜像) 只能靠 rebuild() 整体刷新
+        self.live = hasattr(self.source, 'add_listener')
+        self.sig = None
+        if self.live: self.source.add_listener(self._on_change)
+        self.rebuild()
+
+    def rebuild(self):
+        n = self.w * self.h
+        self.revealed = array('i', [0]) * n
+        self.flagged = array('i', [0]) * n
+        self.questioned = array('i', [0]) * n
+        self.exploded = array('i', [0]) * n
+        self.marks = {} # 扁平下标 -> 当前标记,用于判断标记变化的来源 (标记很少,不按格子数分配)
+        self.buf = bytearray(self.rgb['tile_closed']) * n
+        touched = set()
+        hidden = getattr(self.source, 'hidden', ())
+        for r, c in self.m.revealed:
+            if (r, c) not in hidden: touched.add(self._reveal(r, c))
+        for r, c in self.m.flags: touched.add(self._mark(r, c, self.MARK_FLAG))
+        for r, c in self.m.questions: touched.add(self._mark(r, c, self.MARK_QUESTION))
+        for b in touched: self._recolor(b)
+        self.dirty = True
+
+    def _block_of(self, r, c):
+        return (r // self.block) * self.w + c // self.block
+
+    def _reveal(self, r, c):
+        b = self._block_of(r, c)
+        self.revealed[b] += 1
+        if self.m.grid[r][c] == -1: self.exploded[b] += 1
+        return b
+
+    def _mark(self, r, c, state):
+        i = r * self.m.cols + c
+        b = self._block_of(r, c)
+        old = self.marks.pop(i, self.MARK_NONE)
+        if old == self.MARK_FLAG: self.flagged[b] -= 1
+        elif old == self.MARK_QUESTION: self.questioned[b] -= 1
+        if state == self.MARK_FLAG: self.flagged[b] += 1
+        elif state == self.MARK_QUESTION: self.questioned[b] += 1
+        if state != self.MARK_NONE: self.marks[i] = state
+        return b
+
+    def _on_change(self, kind, cells):
+        touched = set()
+        if kind == CHANGE_REVEAL:
+            for r, c in cells: touched.add(self._reveal(r, c))
+        else:
+            codes = {'flag': self.MARK_FLAG, 'question': self.MARK_QUESTION, 'none': self.MARK_NONE}
+            for r, c, state in cells: touched.add(self._mark(r, c, codes[state]))
+        for b in touched: self._recolor(b)
+        self.dirty = True
+
+    def _recolor(self, b):
+        """按块内统计重新计算一个像素:雷 > 旗 > 问号 > 按翻开比例在关闭/打开色之间插值"""
+        rgb = self.rgb
+        if self.exploded[b]: color = rgb['mine']
+        elif self.flagged[b]: color = rgb['flag']
+        elif self.questioned[b]: color = rgb['question']
+        elif self.block == 1 and self.revealed[b]:
+            # 一格一像素时保留数字颜色
+            val = self.m.grid[b // self.w][b % self.w]
+            color = self.nums[min(val-1, 5)] if val > 0 else rgb['tile_open']
+        else:
+            by, bx = divmod(b, self.w)
+            cells = min(self.block, self.m.rows - by * self.block) * min(self.block, self.m.cols - bx * self.block)
+            t = self.revealed[b] / cells
+            closed, opened = rgb['tile_closed'], rgb['tile_open']
+            color = bytes(int(closed[k] + (opened[k] - closed[k]) * t) for k in range(3))
+        self.buf[b * 3:b * 3 + 3] = color
+
+    def texture(self):
+        """返回可供 image() 绘制的图像名;只有内容变化时才重新上传"""
+        if self.dirty or self._texture is None:
+            self.dirty = False
+            if self._texture is not None: unload_image(self._texture)
+            self._texture = load_pil_image(Image.frombytes('RGB', (self.w, self.h), bytes(self.buf)))
+        return self._texture
+
+
+class RevealAnimator:
+    """
+    大面积翻开的逐帧动画调度器。
+    Model 的状态立即更新;本类只负责“视觉上何时翻开”:
+    大的变更集按 BFS 波前分层,每帧放出若干层,并受每帧时间预算约束。
+    整段动画最多持续 MAX_FRAMES 帧:每帧的层数按剩余层数 / 剩余帧数取整,
+    即使波前有上千层 (细长的空白走廊) 也不会拖上几十秒;到达上限时直接显示剩余部分。
+    下游 (渲染器的像素缓冲等) 通过 add_listener 订阅延迟后的变更事件。
+    """
+    MIN_ANIMATED = 64      # 小于该数量的变更集直接显示,不做动画
+    MAX_FRAMES = 45        # 一段动画最多持续的帧数 (60 FPS 下约 0.75 秒)
+    FRAME_BUDGET = 0.004   # 每帧用于放出格子的时间预算 (秒)
+
+    def __init__(self, model):
+        self.m = model
+        self.nb = table_for(model)
+        self.layers = deque()  # 待放出的波前,每层是一个格子列表
+        self.hidden = set()    # 已翻开但尚未显示的格子
+        self.frames_left = 0   # 本段动画剩余的帧数
+        self.listeners = []
+        model.add_listener(self._on_change)
+
+    def add_listener(self, fn):
+        self.listeners.append(fn)
+
+    def _notify(self, kind, cells):
+        if not cells: return
+        for fn in self.listeners: fn(kind, cells)
+
+    def _on_change(self, kind, cells):
+        if kind == CHANGE_MARK or len(cells) < self.MIN_ANIMATED:
+            self._notify(kind, cells)
+            return
+        self.hidden.update(cells)
+        self.layers.extend(self._wavefronts(cells))
+        self.frames_left = self.MAX_FRAMES # 新的一次大面积翻开重新计时
+
+    def _wavefronts(self, cells):
+        """把变更集按 BFS 层次分组,从第一个格子 (即点击处) 开始;不连通的部分依次接在后面"""
+        pending = set(cells)
+        layers = []
+        for seed in cells:
+            if seed not in pending: continue
+            pending.discard(seed)
+            layer = [seed]
+            while layer:
+                layers.append(layer)
+                nxt = []
+                for r, c in layer:
+                    for pos in self.nb.around[r * self.m.cols + c]:
+                        if pos in pending:
+                            pending.discard(pos)
+                            nxt.append(pos)
+                layer = nxt
+        return layers
+
+    def advance(self):
+        """每帧调用一次:在时间预算内放出下一批波前"""
+        if not self.layers: return
+        # 游戏结束时不再拖延,一次性显示全部
+        if self.m.game_over or self.m.won:
+            self.finish()
+            return
+        # 帧数用完:剩余部分一次性显示
+        if self.frames_left <= 1:
+            self.finish()
+            return
+        per_frame = -(-len(self.layers) // self.frames_left)
+        self.frames_left -= 1
+        deadline = time.perf_counter() + self.FRAME_BUDGET
+        released = []
+        for _ in range(per_frame):
+            if not self.layers or time.perf_counter() > deadline: break
+            layer = self.layers.popleft()
+            released.extend(layer)
+        self.hidden.difference_update(released)
+        self._notify(CHANGE_REVEAL, released)
+
+    def finish(self):
+        released = [pos for layer in self.layers for pos in layer]
+        self.layers.clear()
+        self.hidden.clear()
+        self.frames_left = 0
+        self._notify(CHANGE_REVEAL, released)
+
 
 class GameRenderer:
     """负责具体的绘图工作"""
     
+    # 细节层级 (LOD) 阈值,单位:点
+    LOD_GLYPH_MIN = 12  # 格子小于该尺寸时文字已无法辨认:只画色块,不画边框和文字
+    LOD_BITMAP_MAX = 4  # 格子小于该尺寸时整盘光栅化为一张位图 (一格或一块一像素),每帧只画一次
+    BITMAP_MAX_SIDE = 1024 # 位图最长边的像素数上限,更大的棋盘按块聚合
+    MAX_TILE = 48       # 放大的上限 (点);下限是整盘放进屏幕的尺寸
+    
     def __init__(self, scene_instance, model):
         self.s = scene_instance # 持有 Scene 对象 (为了获取屏幕尺寸)
         self.m = model          # 持有 Model 对象 (为了获取数据)
@@ -20,9 +225,34 @@ class GameRenderer:
             'nums': ['#2980b9', '#27ae60', '#d35400', '#8e44ad', '#c0392b', '#7f8c8d']
         }
         self.hud_height = 60 # 顶部信息栏高度
+        
+        # 拓扑只影响摆放:六边形的奇数行右移半格,立体棋盘在层与层之间画分隔线
+        self.kind, self.layer = parse(getattr(model, 'topology', 'grid'))
+        
+        # HUD 文本缓存:只有数值变化时才重新格式化
+        self._hud_cache = {}
+        
+        # 大面积翻开的逐帧动画 (观众端镜像等没有监听接口的棋盘不做动画)
+        self.animator = RevealAnimator(model) if hasattr(model, 'add_listener') else None
+        self.hidden = self.animator.hidden if self.animator else set()
+        
+        # 位图模式与小地图的像素缓冲,首次需要时才创建
+        self._bitmap = None
+        self.minimap = None
+        self.minimap_size = 120 # 小地图最长边 (点)
+        
+        # 视口:相对居中位置的平移量 (点),由拖动手势修改,每帧绘制前夹紧到棋盘范围内
+        self.pan_x = self.pan_y = 0.0
+        
+        # 后台任务进行中的状态文字 (例如正在生成雷区),显示在 HUD 中部
+        self.status = None
+        
+        # 后台分析给出的提示 {'safe': 格子集合, 'mines': 格子集合},由控制器在帧边界写入
+        self.hints = None
 
     def render(self):
         """主渲染循环,每帧调用"""
+        if self.animator: self.animator.advance()
         
         # 1. 绘制顶部 HUD 背景
         fill(self.colors['hud_bg'])
@@ -30,33 +260,221 @@ class GameRenderer:
         
         # 2. 绘制时间
         tint('white')
-        text(f"⏱ {int(self.m.get_duration())}s", 'Helvetica-Bold', 20, 50, self.s.size.h - 30)
+        text(self._hud_text('time', int(self.m.get_duration()), "⏱ {}s"), 'Helvetica-Bold', 20, 50, self.s.size.h - 30)
         
         # 3. 绘制剩余雷数
         mines_left = self.m.mines - len(self.m.flags)
-        text(f"💣 {mines_left}", 'Helvetica-Bold', 20, self.s.size.w - 50, self.s.size.h - 30)
+        text(self._hud_text('mines', mines_left, "💣 {}"), 'Helvetica-Bold', 20, self.s.size.w - 50, self.s.size.h - 30)
+        
+        # 后台任务状态:有进度时显示阶段与百分比,末尾的点随时间循环,表示仍在进行
+        if self.status:
+            msg = self.status
+            progress = getattr(self.m, 'generation', None)
+            if progress: msg += f' · {progress[0]} {int(progress[1] * 100)}%'
+            dots = '.' * (int(time.time() * 3) % 4)
+            text(msg + dots, 'Helvetica', 16, self.s.size.w / 2, self.s.size.h - 30)
 
-        # 4. 计算网格居中位置
-        grid_w = self.m.cols * self.s.tile_size
+        # 4. 计算网格位置:居中后加上视口平移
+        grid_w = self.grid_span() * self.s.tile_size
         grid_h = self.m.rows * self.s.tile_size
-        start_x = (self.s.size.w - grid_w) / 2
-        start_y = (self.s.size.h - self.hud_height - grid_h) / 2
+        self._clamp_pan(grid_w, grid_h)
+        start_x = (self.s.size.w - grid_w) / 2 + self.pan_x
+        start_y = (self.s.size.h - self.hud_height - grid_h) / 2 + self.pan_y
         
         # 将原点保存回 Scene,供 Controller 计算点击坐标使用
         self.s.grid_origin = (start_x, start_y)
 
-        # 5. 遍历绘制每个格子
-        for r in range(self.m.rows):
-            for c in range(self.m.cols):
-                # 计算像素坐标
-                x = start_x + c * self.s.tile_size
-                # 注意:Scene坐标系 y=0 在底部,所以行号 r 需要反转
-                y = start_y + (self.m.rows - 1 - r) * self.s.tile_size
-                self._draw_single_tile(r, c, x, y)
+        # 5. 按格子尺寸选择细节层级
+        size = self.s.tile_size
+        if size < self.LOD_BITMAP_MAX:
+            self._render_bitmap(start_x, start_y, grid_w, grid_h)
+        elif size < self.LOD_GLYPH_MIN:
+            self._render_colors(start_x, start_y, grid_w, grid_h)
+        else:
+            # 只遍历视口内的格子 (六边形错位可能露出右侧多半格)
+            r0, c0, r1, c1 = self.viewport()
+            if self.kind == 'hex': c1 = min(self.m.cols, c1 + 1)
+            for r in range(r0, r1):
+                for c in range(c0, c1):
+                    # 计算像素坐标
+                    x = start_x + c * self.s.tile_size + self._row_shift(r)
+                    # 注意:Scene坐标系 y=0 在底部,所以行号 r 需要反转
+                    y = start_y + (self.m.rows - 1 - r) * self.s.tile_size
+                    self._draw_single_tile(r, c, x, y)
+        
+        if self.kind == 'cube': self._render_layers(start_x, start_y, grid_w)
+        
+        # 6. 提示框
+        if self.hints: self._render_hints(start_x, start_y)
+        
+        # 7. 小地图
+        if self.wants_minimap(): self.render_minimap()
+
+    def grid_span(self):
+        """棋盘宽度占多少个格子 (六边形错位多出半格)"""
+        return self.m.cols + (0.5 if self.kind == 'hex' and self.m.rows > 1 else 0)
+
+    def fit_tile_size(self):
+        """让整个棋盘放进屏幕 (扣除 HUD) 的格子尺寸"""
+        return min(self.s.size.w / self.grid_span(), (self.s.size.h - self.hud_height) / self.m.rows)
+
+    def _clamp_pan(self, grid_w, grid_h):
+        """棋盘比屏幕小的方向保持居中,比屏幕大的方向不允许拖出空白"""
+        lim_x = max(0, (grid_w - self.s.size.w) / 2)
+        lim_y = max(0, (grid_h - (self.s.size.h - self.hud_height)) / 2)
+        self.pan_x = min(lim_x, max(-lim_x, self.pan_x))
+        self.pan_y = min(lim_y, max(-lim_y, self.pan_y))
+
+    def pan_by(self, dx, dy):
+        self.pan_x += dx
+        self.pan_y += dy
+
+    def zoom_at(self, scale, x, y):
+        """以屏幕点 (x, y) 为中心缩放,缩放前后该点下面是同一个棋盘位置"""
+        old = self.s.tile_size
+        new = min(max(self.MAX_TILE, self.fit_tile_size()), max(self.fit_tile_size(), old * scale))
+        if new == old: return
+        ox, oy = self.s.grid_origin
+        k = new / old
+        # 新原点 = 缩放中心 - (中心到旧原点的距离) × k,再换算回相对居中位置的平移量
+        self.pan_x = x - (x - ox) * k - (self.s.size.w - self.grid_span() * new) / 2
+        self.pan_y = y - (y - oy) * k - (self.s.size.h - self.hud_height - self.m.rows * new) / 2
+        self.s.tile_size = new
+
+    def _row_shift(self, r):
+        """第 r 行的水平偏移:六边形的奇数行右移半格"""
+        return self.s.tile_size / 2 if self.kind == 'hex' and r & 1 else 0
+
+    def _render_layers(self, start_x, start_y, grid_w):
+        """立体棋盘:各层之间画一条分隔线"""
+        size = self.s.tile_size
+        stroke(self.colors['hud_bg']); stroke_weight(max(1, size / 6))
+        for z in range(1, self.m.rows // self.layer):
+            y = start_y + (self.m.rows - z * self.layer) * size
+            line(start_x, y, start_x + grid_w, y)
+
+    def _hud_text(self, key, value, fmt):
+        """返回缓存的 HUD 字符串,数值不变时不重复格式化"""
+        cached = self._hud_cache.get(key)
+        if cached is None or cached[0] != value:
+            cached = self._hud_cache[key] = (value, fmt.format(value))
+        return cached[1]
+
+    def _cell_color(self, r, c):
+        """色块模式下格子的颜色;未翻开且无标记的格子返回 None"""
+        if (r, c) in self.m.revealed:
+            val = self.m.grid[r][c]
+            if val == -1: return self.colors['mine']
+            if val > 0: return self.colors['nums'][min(val-1, 5)]
+            return self.colors['tile_open']
+        if (r, c) in self.m.flags: return self.colors['flag']
+        if (r, c) in self.m.questions: return self.colors['question']
+        return None
+
+    def _render_colors(self, start_x, start_y, grid_w, grid_h):
+        """
+        色块模式:先用一个矩形铺满未翻开的底色,
+        再只绘制已翻开/有标记的格子,无边框、无文字。
+        """
+        size = self.s.tile_size
+        no_stroke()
+        fill(self.colors['tile_closed'])
+        rect(start_x, start_y, grid_w, grid_h)
+        top = start_y + (self.m.rows - 1) * size
+        hidden = self.hidden
+        r0, c0, r1, c1 = self.viewport()
+        if self.kind == 'hex': c1 = min(self.m.cols, c1 + 1)
+        m = self.m
+        if (r1 - r0) * (c1 - c0) < len(m.revealed) + len(m.flags) + len(m.questions):
+            # 放大后视口里的格子比已翻开/已标记的格子还少:直接逐格查询视口
+            cells = ((r, c) for r in range(r0, r1) for c in range(c0, c1))
+        else:
+            cells = (pos for group in (m.revealed, m.flags, m.questions) for pos in group
+                     if r0 <= pos[0] < r1 and c0 <= pos[1] < c1)
+        for r, c in cells:
+            if (r, c) in hidden: continue # 动画中尚未显示的格子保持底色
+            color = self._cell_color(r, c)
+            if color is None: continue
+            fill(color)
+            rect(start_x + c * size + self._row_shift(r), top - r * size, size, size)
+
+    def _render_bitmap(self, start_x, start_y, grid_w, grid_h):
+        """位图模式:整盘一张图,状态不变时每帧只有一次 image 调用 (格子小于 4 点,六边形错位忽略不计)"""
+        if self._bitmap is None:
+            block = max(1, -(-max(self.m.rows, self.m.cols) // self.BITMAP_MAX_SIDE))
+            self._bitmap = BoardPixels(self.m, self.colors, block, source=self.animator)
+        self._refresh_if_detached(self._bitmap)
+        image(self._bitmap.texture(), start_x, start_y, grid_w, grid_h)
+
+    def _refresh_if_detached(self, pixels):
+        """没有监听接口的棋盘用计数签名判断是否需要整体重建"""
+        if pixels.live: return
+        m = self.m
+        sig = (len(m.revealed), len(m.flags), len(m.questions), m.game_over)
+        if sig != pixels.sig:
+            pixels.sig = sig
+            pixels.rebuild()
+
+    def _render_hints(self, start_x, start_y):
+        """给提示的格子描边:绿色为安全,红色为雷"""
+        size = self.s.tile_size
+        top = start_y + (self.m.rows - 1) * size
+        no_fill(); stroke_weight(2)
+        for key, color in (('safe', '#2ecc71'), ('mines', '#e74c3c')):
+            stroke(color)
+            for r, c in self.hints[key]:
+                rect(start_x + c * size + self._row_shift(r), top - r * size, size, size)
+
+    def viewport(self):
+        """当前屏幕上可见的格子范围 (r0, c0, r1, c1),含头不含尾"""
+        ox, oy = self.s.grid_origin
+        size = self.s.tile_size
+        view_h = self.s.size.h - self.hud_height
+        c0 = max(0, int(-ox // size))
+        c1 = min(self.m.cols, int(-(-(self.s.size.w - ox) // size)))
+        r0 = max(0, self.m.rows - int(-(-(view_h - oy) // size)))
+        r1 = min(self.m.rows, self.m.rows - int(-oy // size))
+        return r0, c0, r1, c1
+
+    def wants_minimap(self):
+        """放大后视口只覆盖棋盘的一部分时才显示小地图;整盘可见时小地图没有意义,也会挡住棋盘"""
+        return self.viewport() != (0, 0, self.m.rows, self.m.cols)
+
+    def render_minimap(self):
+        """右下角绘制小地图和当前视口框"""
+        m = self.m
+        if self.minimap is None:
+            # 每边最多 256 像素,大棋盘按块聚合
+            block = max(1, -(-max(m.rows, m.cols) // 256))
+            self.minimap = BoardPixels(m, self.colors, block, source=self.animator)
+        self._refresh_if_detached(self.minimap)
+        scale = self.minimap_size / max(m.rows, m.cols)
+        mw, mh = m.cols * scale, m.rows * scale
+        x, y = self.s.size.w - mw - 10, 10
+        image(self.minimap.texture(), x, y, mw, mh)
+        
+        r0, c0, r1, c1 = self.viewport()
+        no_fill(); stroke('white'); stroke_weight(1)
+        rect(x + c0 * scale, y + (m.rows - r1) * scale, (c1 - c0) * scale, (r1 - r0) * scale)
+
+    def cell_at(self, x, y):
+        """
+        屏幕坐标 -> 格子坐标 (命中测试)。
+        返回共享邻接表里的坐标元组;点在棋盘外时返回 None。
+        """
+        ox, oy = self.s.grid_origin
+        if y < oy: return None
+        r = self.m.rows - 1 - int((y - oy) / self.s.tile_size)
+        if not 0 <= r < self.m.rows: return None
+        dx = x - ox - self._row_shift(r)
+        if dx < 0: return None
+        c = int(dx / self.s.tile_size)
+        if c >= self.m.cols: return None
+        return table_for(self.m).coords[r * self.m.cols + c]
 
     def _draw_single_tile(self, r, c, x, y):
         size = self.s.tile_size
-        is_rev = (r, c) in self.m.revealed
+        is_rev = (r, c) in self.m.revealed and (r, c) not in self.hidden
         
         # 绘制方块背景
         fill(self.colors['tile_open'] if is_rev else self.colors['tile_closed'])
@@ -0,0 +1,172 @@
+import collections
+import queue
+import threading
+
+from topology import grid_table
+
+# ==========================================
+# 后台分析线程:快照 + 版本号取消 + 帧边界发布
+# ==========================================
+# Model 只允许在主线程 (Scene 帧循环) 修改,后台线程永远不直接读它:
+#   1. submit() 在主线程上拍下一份不可变快照 (只含玩家可见的信息),连同当前版本号交给工作线程;
+#   2. Model 每次广播变更版本号 +1,正在跑的任务通过 cancelled() 发现自己已过期并尽早退出;
+#   3. 结果先放进队列,由控制器在 update() 里调用 poll() 统一回调,过期结果直接丢弃。
+# 分析结果只取决于可见局面,按 (任务, 局面 Zobrist 哈希) 存进 LRU 缓存:
+# 悔棋回到旧局面、同一 seed 的回放再走到同一步时,直接复用上次的结果。
+
+BoardSnapshot = collections.namedtuple(
+    'BoardSnapshot',
+    'version diff_name rows cols mines topology revealed flags questions numbers game_over won zobrist')
+
+
+class AnalysisCache:
+    """容量有限的 LRU 缓存,只在主线程读写 (submit / poll)"""
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity: self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+def snapshot(model, version=0):
+    """
+    拍下玩家可见状态的不可变快照 (需在主线程调用)。
+    numbers 只包含已翻开格子的数值,未翻开的雷区信息不会泄露给分析任务。
+    """
+    grid = model.grid
+    return BoardSnapshot(
+        version, model.diff_name, model.rows, model.cols, model.mines, getattr(model, 'topology', 'grid'),
+        frozenset(model.revealed), frozenset(model.flags), frozenset(model.questions),
+        {(r, c): grid[r][c] for r, c in model.revealed},
+        model.game_over, model.won, getattr(model, 'zobrist', None))
+
+
+def basic_hints(snap, cancelled):
+    """
+    单点推理提示:数字周围旗帜数已满 => 其余未翻开邻居安全;
+    未翻开邻居数恰好等于数字 => 它们都是雷。反复推导到不再有新结论。
+    :return: {'safe': 安全格集合, 'mines': 必为雷的格子集合};被取消时返回 None
+    """
+    around, cols = grid_table(snap.rows, snap.cols, snap.topology).around, snap.cols
+    revealed, numbers = snap.revealed, snap.numbers
+    mines, safe = set(snap.flags), set()
+    frontier = [pos for pos, v in numbers.items() if v > 0]
+    changed = True
+    while changed:
+        if cancelled(): return None
+        changed = False
+        for r, c in frontier:
+            hidden = [pos for pos in around[r * cols + c] if pos not in revealed]
+            known = sum(1 for pos in hidden if pos in mines)
+            unknown = [pos for pos in hidden if pos not in mines and pos not in safe]
+            if not unknown: continue
+            v = numbers[(r, c)]
+            if known == v:
+                safe.update(unknown)
+                changed = True
+            elif len(unknown) == v - known:
+                mines.update(unknown)
+                changed = True
+    return {'safe': safe, 'mines': mines - snap.flags}
+
+
+class AnalysisWorker:
+    """
+    单个后台线程顺序执行分析任务。
+    任务签名: fn(snapshot, cancelled) -> 结果;cancelled() 返回 True 时任务应尽快返回。
+    回调只会在主线程的 poll() 中被调用,因此可以放心修改 Scene / 渲染状态。
+    submit 的结果按局面哈希缓存 (跨对局共用),任务必须只依赖快照、不能修改返回的结果。
+    """
+
+    def __init__(self, cache_size=256):
+        self.model = None
+        self.version = 0      # Model 每次变更 +1 (只在主线程写,工作线程只读)
+        self.pending = 0      # 已提交但结果尚未发布的任务数 (只在主线程读写)
+        self.jobs = queue.Queue()
+        self.results = collections.deque()
+        self.cache = AnalysisCache(cache_size)
+        self.thread = None
+
+    def attach(self, model):
+        """切换到新的对局;旧对局的任务与结果全部作废"""
+        if self.model is not None: self.model.remove_listener(self._on_change)
+        self.model = model
+        self.version += 1
+        model.add_listener(self._on_change)
+
+    def _on_change(self, kind, cells):
+        self.version += 1
+
+    def submit(self, fn, callback):
+        """
+        在主线程调用:拍快照并提交分析任务 fn(snapshot, cancelled)。
+        同一局面算过的结果直接从缓存取,仍在下一次 poll() 中回调。
+        """
+        snap = snapshot(self.model, self.version)
+        key = None if snap.zobrist is None else (fn, snap.zobrist)
+        if key is not None:
+            result = self.cache.get(key)
+            if result is not None:
+                self.pending += 1
+                self.results.append((self.version, callback, result, None, None, None))
+                return
+        self.run(lambda cancelled: fn(snap, cancelled), callback, key)
+
+    def run(self, fn, callback, cache_key=None, errback=None):
+        """
+        在主线程调用:提交任意后台任务 fn(cancelled),以提交时的版本号判断是否过期。
+        cache_key 不为 None 时,成功的结果会以它为键存进缓存。
+        errback(error) 在任务没有产生有效结果时调用 (同样在 poll() 中):
+        error 为任务抛出的异常;过期、被取消或返回 None 时为 None。
+        每个任务恰好回调 callback 或 errback 之一 (errback 为 None 时失败静默丢弃)。
+        """
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        self.pending += 1
+        self.jobs.put((self.version, fn, callback, cache_key, errback))
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None: return
+            version, fn, callback, cache_key, errback = job
+            result = error = None
+            if version == self.version:
+                try: result = fn(lambda: version != self.version)
+                except Exception as e: error = e # 任务失败不能拖垮工作线程,异常交给 errback
+            # 过期或被取消的任务也要回报,主线程据此维护 pending
+            self.results.append((version, callback, result, cache_key, errback, error))
+
+    def poll(self):
+        """每帧在主线程调用一次,发布仍然有效的结果"""
+        while self.results:
+            version, callback, result, cache_key, errback, error = self.results.popleft()
+            self.pending -= 1
+            # 过期的结果仍然对应它自己的局面,照样缓存
+            if cache_key is not None and result is not None: self.cache.put(cache_key, result)
+            if version == self.version and result is not None: callback(result)
+            elif errback: errback(error)
+
+    def stop(self):
+        if self.thread is not None:
+            self.jobs.put(None)
+            self.thread = None